@@ -0,0 +1,245 @@
+"""Benchmark the capture-and-analysis path on synthetic frames.
+
+Runs headless: frames come from ``SyntheticCaptureBackend`` and a stand-in
+``screen_brightness_control`` module records brightness writes instead of
+touching the hardware. Every stage is timed over ``--repeat`` runs
+and run a few more times under ``tracemalloc`` to measure the memory it allocates.
+
+Usage:
+    python benchmarks/hot_path.py                      # compare against baselines.json
+    python benchmarks/hot_path.py --update-baselines   # record new baselines
+    python benchmarks/hot_path.py --resolutions 1080p 4k --json
+
+Exits with status 1 when a stage is slower than its baseline by more than
+``--tolerance`` or allocates noticeably more memory. Timings depend on the
+machine, so record baselines on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Name: (width, height, monitors side by side)
+RESOLUTIONS = {
+    "1080p": (1920, 1080, 1),
+    "1440p": (2560, 1440, 1),
+    "4k": (3840, 2160, 1),
+    "5k": (5120, 2880, 1),
+    "dual-4k": (7680, 2160, 2),
+}
+
+# Extra transient memory, in KiB, a stage may use over its baseline before it counts as a regression
+MEMORY_SLACK_KIB = 64
+
+
+def install_fake_sbc():
+    """Replace ``screen_brightness_control`` with an in-memory stand-in and return it."""
+    fake = types.ModuleType("screen_brightness_control")
+    fake.value = 50
+    fake.reads = 0
+    fake.writes = 0
+
+    def get_brightness(display=None):
+        fake.reads += 1
+        return [fake.value]
+
+    def set_brightness(value, display=None):
+        fake.writes += 1
+        fake.value = value
+
+    fake.get_brightness = get_brightness
+    fake.set_brightness = set_brightness
+    sys.modules["screen_brightness_control"] = fake
+    return fake
+
+
+fake_sbc = install_fake_sbc()
+
+from src.controllers import (  # noqa: E402  (must follow the fake sbc)
+    BrightnessController, Display, LumaHistogram, LuminanceEstimator, TileLuminanceTracker,
+    luminance_grid,
+)
+from src.controllers.capture import SyntheticCaptureBackend  # noqa: E402
+
+
+def _displays(width, height, monitors):
+    if monitors == 1:
+        return [Display(None, None, "all")]
+    monitor_width = width // monitors
+    return [Display(index, (index * monitor_width, 0, monitor_width, height), f"display {index}")
+            for index in range(monitors)]
+
+
+def _stages(width, height, monitors):
+    """Return ``{stage: callable}`` for one resolution. Frames alternate so every run sees a change."""
+    bright = SyntheticCaptureBackend._generate("noise", width, height, 4, 1)
+    dark = SyntheticCaptureBackend._generate("noise", width, height, 4, 2) // 2
+    # BGRA like the X11 shared memory backend; the two frames lead to different targets
+    capture = SyntheticCaptureBackend(frames=[bright, dark], channel_order="BGRA")
+    order = capture.channel_order
+    frames = list(capture.frames)
+    estimator = LuminanceEstimator()
+    sampler = LuminanceEstimator("stride")
+    tracker = TileLuminanceTracker()
+    tracker.update(frames[0], order)
+    histogram = LumaHistogram()
+    histogram.update(sampler.sample(frames[0]), order)
+    flip = iter(range(1 << 62))
+
+    def next_frame():
+        return frames[next(flip) % 2]
+
+    controller = BrightnessController(None, capture_backend="synthetic", displays=_displays(width, height, monitors),
+                                      backlight="memory")
+    controller.set_transition(duration=0)
+    controller.capture.close()
+    controller.capture = capture
+
+    stages = {
+        "capture": capture.grab,
+        "estimate": lambda: estimator.estimate(next_frame(), order),
+        "tiles_changed": lambda: tracker.update(next_frame(), order),
+        "tiles_unchanged": lambda: tracker.update(frames[0], order),  # The warm-up run absorbs the change
+        "luminance_grid": lambda: luminance_grid(estimator.sample(next_frame()), channel_order=order),
+        "histogram": lambda: histogram.update(sampler.sample(next_frame()), order),
+        "target": lambda: controller.calculate_target_brightness(127.5, 50, 20, 80),
+        "tick": lambda: controller.adjust_brightness(0, 10, 80, 20),
+    }
+    return stages, controller
+
+
+def _time(function, repeat):
+    function()  # Warm up caches and lazily built layouts
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples), statistics.median(samples), max(samples)
+
+
+def _memory(function):
+    """Return (peak transient KiB, retained KiB) allocated by one call."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024, (after - before) / 1024
+
+
+def run(resolutions, repeat):
+    """Benchmark every stage at every resolution. Returns ``{resolution: {stage: result}}``."""
+    results = {}
+    for name in resolutions:
+        width, height, monitors = RESOLUTIONS[name]
+        stages, controller = _stages(width, height, monitors)
+        results[name] = {}
+        try:
+            for stage, function in stages.items():
+                min_ms, median_ms, max_ms = _time(function, repeat)
+                # Stages that fan out to threads vary from run to run; keep the smallest
+                peak_kib, retained_kib = min(_memory(function) for _ in range(3))
+                results[name][stage] = {
+                    "min_ms": round(min_ms, 3),
+                    "median_ms": round(median_ms, 3),
+                    "max_ms": round(max_ms, 3),
+                    "peak_kib": round(peak_kib, 1),
+                    "retained_kib": round(retained_kib, 1),
+                }
+        finally:
+            controller.close()
+    return results
+
+
+def compare(results, baselines, tolerance):
+    """Return a list of regression messages, empty when everything is within bounds."""
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            baseline = baselines.get(name, {}).get(stage)
+            if baseline is None:
+                continue
+            # The fastest run is the least disturbed by other processes. Sub-millisecond
+            # stages are still dominated by noise, so allow a small absolute margin too
+            time_limit = baseline["min_ms"] * (1 + tolerance) + 0.05
+            if result["min_ms"] > time_limit:
+                regressions.append(
+                    f"{name} {stage}: {result['min_ms']:.3f} ms, baseline {baseline['min_ms']:.3f} ms"
+                )
+            memory_limit = baseline["peak_kib"] * 1.1 + MEMORY_SLACK_KIB
+            if result["peak_kib"] > memory_limit:
+                regressions.append(
+                    f"{name} {stage}: {result['peak_kib']:.1f} KiB peak, baseline {baseline['peak_kib']:.1f} KiB"
+                )
+    return regressions
+
+
+def print_report(results, baselines):
+    print(f"{'resolution':<10} {'stage':<16} {'min ms':>9} {'baseline':>9} {'median ms':>10} {'max ms':>9} "
+          f"{'peak KiB':>10} {'kept KiB':>9}")
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            baseline = baselines.get(name, {}).get(stage)
+            reference = f"{baseline['min_ms']:.3f}" if baseline else "-"
+            print(f"{name:<10} {stage:<16} {result['min_ms']:>9.3f} {reference:>9} "
+                  f"{result['median_ms']:>10.3f} {result['max_ms']:>9.3f} "
+                  f"{result['peak_kib']:>10.1f} {result['retained_kib']:>9.1f}")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPeak RSS: {max_rss:.1f} MiB, fake sbc: {fake_sbc.reads} reads, {fake_sbc.writes} writes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per stage")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baseline file to compare against")
+    parser.add_argument("--update-baselines", action="store_true", help="store these results as the baselines")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="allowed relative slowdown before a stage counts as a regression")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.resolutions, args.repeat)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, "r") as file:
+            baselines = json.load(file)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, baselines)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(args.baselines, "w") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    if regressions:
+        print("\nRegressions:", file=sys.stderr)
+        for message in regressions:
+            print(f"  {message}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
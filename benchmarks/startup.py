@@ -0,0 +1,183 @@
+"""Measure how long Glimmer takes to start and what it imports on the way.
+
+Starts the UI in a fresh interpreter, several times, and times the span
+from launching the process to the first pass of the Qt event loop after
+the window and tray icon are set up ("time to tray"), and to the first
+brightness adjustment. The resident set size is taken at the tray and
+again after ``--idle`` seconds of running. Both startup modes are
+measured: "eager" builds the window at once, "minimized" starts with only
+the tray icon (``python src/main.py --minimized``). Also checks that none
+of the heavy analysis modules were imported by the time of the tray, and
+lists the slowest imports reported by ``python -X importtime``.
+
+Usage:
+    python benchmarks/startup.py                 # enforce the default budget
+    python benchmarks/startup.py --budget 0.8 --runs 10 --mode minimized
+
+Without a display, Qt's offscreen platform is used, the tray is assumed to
+be available, and the synthetic capture backend and an in-memory backlight
+stand in for the screen. Exits with status 1 when the median time to tray
+of a mode exceeds the budget or a heavy module was imported before the
+tray was ready.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported before the first capture tick
+HEAVY_MODULES = ("cv2", "numpy", "PIL.ImageGrab", "screen_brightness_control")
+
+MODES = ("eager", "minimized")
+
+CHILD = r"""
+import json, os, sys, time
+root = sys.argv[1]
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "src"))
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon
+if os.environ.get("QT_QPA_PLATFORM") == "offscreen":
+    QSystemTrayIcon.isSystemTrayAvailable = staticmethod(lambda: True)
+from src.ui import UI
+
+minimized, idle_ms = sys.argv[3] == "minimized", int(float(sys.argv[4]) * 1000)
+app = QApplication(sys.argv[:1])
+window = UI(start_minimized=minimized)
+if minimized:
+    window.window_manager.show_tray()
+else:
+    window.show()
+report = {}
+
+def rss():
+    with open("/proc/self/status") as status:
+        return next((int(line.split()[1]) for line in status if line.startswith("VmRSS:")), 0)
+
+def ready():
+    report.update(tray_at=time.monotonic(), rss_kib=rss(),
+                  heavy=[name for name in json.loads(sys.argv[2]) if name in sys.modules])
+    if idle_ms < 0:  # Only startup is of interest
+        finish()
+
+def adjusted(*_):
+    if "adjusted_at" not in report:
+        report["adjusted_at"] = time.monotonic()
+        QTimer.singleShot(idle_ms, finish)
+
+def finish():
+    report["idle_rss_kib"] = rss()
+    print(json.dumps(report), flush=True)
+    app.quit()
+
+window.brightness_worker.brightness_updated.connect(adjusted)
+QTimer.singleShot(0, ready)
+QTimer.singleShot(30000, finish)  # No adjustment at all; reported as missing
+app.exec_()
+# Tearing the widget tree down at interpreter exit can crash PyQt; it is not part of startup
+os._exit(0)
+"""
+
+
+def _environment():
+    environment = dict(os.environ)
+    if not environment.get("DISPLAY") and not environment.get("WAYLAND_DISPLAY"):
+        environment.setdefault("QT_QPA_PLATFORM", "offscreen")
+        environment.setdefault("GLIMMER_CAPTURE_BACKEND", "synthetic")
+        environment.setdefault("GLIMMER_BACKLIGHT", "memory")
+    environment.setdefault("GLIMMER_CONTROL_SOCKET", "off")  # Never clash with a running Glimmer
+    return environment
+
+
+def measure_once(mode="eager", idle=2.0, extra_flags=()):
+    """
+    Start the UI once.
+
+    Returns:
+        dict: ``tray`` and ``adjustment`` in seconds since launch (None if no
+        adjustment happened), ``heavy`` modules imported before the tray,
+        ``rss_kib`` at the tray, ``idle_rss_kib`` ``idle`` seconds after the
+        first adjustment (at the tray if ``idle`` is negative), and the
+        child's ``stderr``.
+    """
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, *extra_flags, "-c", CHILD, project_root, json.dumps(HEAVY_MODULES), mode, str(idle)],
+        capture_output=True, text=True, env=_environment(), cwd=os.path.join(project_root, "src"), timeout=60,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup failed with status {result.returncode}:\n{result.stderr[-2000:]}")
+    report = json.loads(lines[-1])
+    return {
+        "tray": report["tray_at"] - started,
+        "adjustment": report["adjusted_at"] - started if "adjusted_at" in report else None,
+        "heavy": report["heavy"],
+        "rss_kib": report["rss_kib"],
+        "idle_rss_kib": report["idle_rss_kib"],
+        "stderr": result.stderr,
+    }
+
+
+def slowest_imports(importtime_output, count=10):
+    """Top-level modules by cumulative import time from ``-X importtime`` output, in ms."""
+    totals = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):  # Nested import, already counted in its parent
+            continue
+        totals.append((int(cumulative) / 1000, name.strip()))
+    return sorted(totals, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of timed starts")
+    parser.add_argument("--budget", type=float, default=1.0, help="maximum median time to tray in seconds")
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both", help="startup mode to measure")
+    parser.add_argument("--idle", type=float, default=2.0,
+                        help="seconds to keep running after the first adjustment before taking the idle RSS")
+    args = parser.parse_args(argv)
+
+    failed = False
+    heavy = set()
+    modes = MODES if args.mode == "both" else (args.mode,)
+    print(f"Median over {args.runs} runs (budget {args.budget * 1000:.0f} ms to tray):")
+    for mode in modes:
+        runs = [measure_once(mode, args.idle) for _ in range(args.runs)]
+        for run in runs:
+            heavy.update(run["heavy"])
+        tray = statistics.median(run["tray"] for run in runs)
+        adjustments = [run["adjustment"] for run in runs if run["adjustment"] is not None]
+        adjustment = f"{statistics.median(adjustments) * 1000:.0f} ms" if adjustments else "none"
+        print(f"  {mode:<9}  tray {tray * 1000:5.0f} ms  first adjustment {adjustment:>8}  "
+              f"RSS at tray {statistics.median(run['rss_kib'] for run in runs) / 1024:5.1f} MiB  "
+              f"idle {statistics.median(run['idle_rss_kib'] for run in runs) / 1024:5.1f} MiB")
+        if len(adjustments) < len(runs):
+            print(f"{mode}: {len(runs) - len(adjustments)} runs made no adjustment", file=sys.stderr)
+            failed = True
+        if tray > args.budget:
+            print(f"{mode}: time to tray {tray * 1000:.0f} ms exceeds the {args.budget * 1000:.0f} ms budget",
+                  file=sys.stderr)
+            failed = True
+
+    importtime = measure_once(modes[0], -1, ("-X", "importtime"))["stderr"]
+    print("Slowest imports:")
+    for milliseconds, name in slowest_imports(importtime):
+        print(f"  {milliseconds:8.1f} ms  {name}")
+
+    if heavy:
+        print(f"Imported before the tray was ready: {', '.join(sorted(heavy))}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
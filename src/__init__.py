@@ -1,10 +1,16 @@
-from src.ui import UI
-from src.controllers.brightness_controller import BrightnessController
-from src.components.title import TitleSection
-from src.components.buttons import ButtonSection
-from src.components.sliders import SliderSection
-from src.components.status import StatusSection
-from src.utils.styles import StyleManager
+import importlib
+
+# Imported on first access so that the controllers (and the headless daemon)
+# can be used without loading PyQt5
+_EXPORTS = {
+    'UI': 'src.ui',
+    'BrightnessController': 'src.controllers.brightness_controller',
+    'TitleSection': 'src.components.title',
+    'ButtonSection': 'src.components.buttons',
+    'SliderSection': 'src.components.sliders',
+    'StatusSection': 'src.components.status',
+    'StyleManager': 'src.utils.styles',
+}
 
 __all__ = [
     'UI',
@@ -14,4 +20,12 @@ __all__ = [
     'SliderSection',
     'StatusSection',
     'StyleManager'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
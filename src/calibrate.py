@@ -0,0 +1,82 @@
+"""Fit sensitivity and brightness limits to the corrections in a trace.
+
+Every time the user changes the brightness by hand while automatic control
+runs, a trace recorded with ``GLIMMER_TRACE_FILE`` keeps the luminance at
+that moment and the brightness the user chose. This command finds the
+sensitivity and limits that would have produced those choices:
+
+    python src/calibrate.py glimmer.trace
+    python src/calibrate.py glimmer.trace --theme Indoor --save
+
+``--save`` writes the fitted limits to the theme and saves the fitted
+sensitivity in the settings file.
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(project_root))
+sys.path.insert(0, project_root)
+
+from src.controllers.calibration import calibrate, corrections_from_trace, target_brightness_grid
+from src.controllers.trace import EVENT_TICK, read_trace
+from src.utils.settings import settings
+from src.utils.theme_file import load_themes, save_themes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fit Glimmer's settings to manual brightness corrections.")
+    parser.add_argument("trace", help="trace file recorded with GLIMMER_TRACE_FILE")
+    parser.add_argument("--theme", default=None, help="theme whose limits are compared and saved")
+    parser.add_argument("--save", action="store_true", help="write the fitted limits to --theme and the fitted sensitivity")
+    parser.add_argument("--settle", type=float, default=5.0,
+                        help="seconds within which repeated corrections count once (default 5)")
+    args = parser.parse_args(argv)
+    if args.save and args.theme is None:
+        parser.error("--save needs --theme")
+
+    try:
+        trace = read_trace(args.trace)
+    except (OSError, ValueError) as e:
+        print(f"Error reading trace: {e}", file=sys.stderr)
+        return 2
+
+    corrections = corrections_from_trace(trace, settle=args.settle)
+    if len(corrections) == 0:
+        print("The trace has no manual corrections to calibrate from", file=sys.stderr)
+        return 1
+
+    # Settings in use at the last correction, or those of the chosen theme
+    last = corrections[-1]
+    current = [int(last["sensitivity"]), int(last["min_brightness"]), int(last["max_brightness"])]
+    themes = load_themes()
+    if args.theme is not None:
+        if args.theme not in themes:
+            print(f"Unknown theme '{args.theme}'. Expected one of {sorted(themes)}", file=sys.stderr)
+            return 2
+        current[2], current[1] = themes[args.theme]
+
+    luminance = corrections["luminance"]
+    brightness = corrections["applied"]
+    fit = calibrate(luminance, brightness, current=tuple(current))
+    before = target_brightness_grid(luminance, *current) - brightness
+
+    ticks = int((trace["event"] == EVENT_TICK).sum())
+    print(f"{fit.samples} manual corrections over {ticks} recorded ticks")
+    print(f"Current: sensitivity {current[0]}, brightness {current[1]}-{current[2]}%, "
+          f"off by {float((before ** 2).mean() ** 0.5):.1f} points")
+    print(f"Fitted:  sensitivity {fit.sensitivity}, brightness {fit.min_brightness}-{fit.max_brightness}%, "
+          f"off by {fit.rmse:.1f} points")
+
+    if args.save:
+        themes[args.theme] = (fit.max_brightness, fit.min_brightness)
+        save_themes(themes)
+        settings.set("sensitivity", fit.sensitivity)
+        settings.close()
+        print(f"Saved the limits to theme {args.theme} and the sensitivity {fit.sensitivity}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -90,14 +90,13 @@ class PersonalizationWindow(QMainWindow):
         elif changed == "min" and value > max_spinbox.value():
             max_spinbox.setValue(value)
 
-        self.parent.THEMES["Outdoor"] = (
-            self.outdoor_max_spinbox.value(),
-            self.outdoor_min_spinbox.value(),
-        )
-        self.parent.THEMES["Indoor"] = (
-            self.indoor_max_spinbox.value(),
-            self.indoor_min_spinbox.value(),
-        )
+    def showEvent(self, event):
+        # Start from the saved limits; edits that were not saved are discarded
+        for title, theme_key in (("Outdoor", "outdoor"), ("Indoor", "indoor")):
+            max_brightness, min_brightness = self.parent.THEMES[title]
+            getattr(self, f"{theme_key}_max_spinbox").setValue(max_brightness)
+            getattr(self, f"{theme_key}_min_spinbox").setValue(min_brightness)
+        super().showEvent(event)
 
     def save_settings(self):
         # Update the THEMES dictionary in the parent UI with new values from the spinboxes
@@ -1,9 +1,8 @@
-import logging
 from PyQt5.QtWidgets import QLabel, QVBoxLayout, QSlider, QGroupBox, QHBoxLayout, QWidget
 from PyQt5.QtCore import Qt
+from src.utils.logs import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = get_logger("ui")
 
 class SliderSection:
     """Slider section component that contains all brightness control sliders."""
@@ -12,7 +11,7 @@ class SliderSection:
         self.parent = parent
         self.layout = QVBoxLayout()
         self._create_sliders()
-        logging.debug("SliderSection initialized.")
+        logger.debug("SliderSection initialized.")
 
     def _create_sliders(self):
         self.group = QGroupBox("Brightness Control")
@@ -29,7 +28,7 @@ class SliderSection:
         self.manual_brightness_slider.valueChanged.connect(
             lambda: self._update_value_label(self.manual_brightness_slider, self.manual_brightness_value_label)
         )
-        logging.debug("Manual brightness slider created with default value: 80.")
+        logger.debug("Manual brightness slider created with default value: 80.")
 
         # Create sliders with values using the new method
         self.sensitivity_slider, self.sensitivity_label, self.sensitivity_value_label = self._create_slider_with_value("Sensitivity:", 1, 10, 7)
@@ -59,7 +58,7 @@ class SliderSection:
         self.group.setFixedHeight(250)  # Adjusted height to accommodate value labels
 
         self.layout.addWidget(self.group)
-        logging.debug("Sliders created and added to the layout.")
+        logger.debug("Sliders created and added to the layout.")
 
     def _create_slider_with_value(self, label_text, min_val, max_val, default_val):
         """Helper method to create sliders with a label and value."""
@@ -74,7 +73,7 @@ class SliderSection:
         slider.setValue(default_val)
         slider.valueChanged.connect(lambda: self._update_value_label(slider, value_label))
 
-        logging.debug(f"Slider created: {label_text} (Range: {min_val}-{max_val}, Default: {default_val}).")
+        logger.debug("Slider created: %s (Range: %s-%s, Default: %s).", label_text, min_val, max_val, default_val)
         return slider, label, value_label
 
     def _create_slider_layout(self, label, value_label, slider):
@@ -96,7 +95,7 @@ class SliderSection:
     def _update_value_label(self, slider, label):
         """Updates the value label whenever the slider value changes."""
         label.setText(f"{slider.value()}")
-        logging.debug(f"Slider value updated: {slider.value()}")
+        logger.debug("Slider value updated: %s", slider.value())
 
     def _ensure_min_max_order(self, value):
         """Ensures that min value is always less than max value."""
@@ -106,11 +105,11 @@ class SliderSection:
         if min_value > max_value:
             if value == self.min_brightness_slider.value():
                 self.min_brightness_slider.setValue(max_value)
-                logging.warning("Min value adjusted to match Max value.")
+                logger.warning("Min value adjusted to match Max value.")
             else:
                 self.max_brightness_slider.setValue(min_value)
-                logging.warning("Max value adjusted to match Min value.")
-        logging.debug(f"Min-Max values ensured: Min = {min_value}, Max = {max_value}.")
+                logger.warning("Max value adjusted to match Min value.")
+        logger.debug("Min-Max values ensured: Min = %s, Max = %s.", min_value, max_value)
 
     def show_automatic_controls(self):
         """Show automatic control sliders and hide manual control sliders."""
@@ -126,7 +125,7 @@ class SliderSection:
         self.manual_brightness_slider.setVisible(False)
         self.manual_brightness_label.setVisible(False)
         self.manual_brightness_value_label.setVisible(False)
-        logging.debug("Automatic controls shown, manual controls hidden.")
+        logger.debug("Automatic controls shown, manual controls hidden.")
 
     def show_manual_controls(self):
         """Show manual control sliders and hide automatic control sliders."""
@@ -143,4 +142,4 @@ class SliderSection:
         self.manual_brightness_label.setVisible(True)
         self.manual_brightness_value_label.setVisible(True)
         self.group.setFixedHeight(250)  # Adjusted height for manual controls
-        logging.debug("Manual controls shown, automatic controls hidden.")
+        logger.debug("Manual controls shown, automatic controls hidden.")
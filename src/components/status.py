@@ -1,21 +1,21 @@
 from PyQt5.QtWidgets import QLabel, QVBoxLayout, QGroupBox
-import logging
+from src.utils.logs import get_logger
+from src.utils.metrics import metrics
 
-# Setting up logging
-logging.basicConfig(level=logging.DEBUG)
+logger = get_logger("ui")
 
 class StatusSection:
     """Status section component that displays brightness information."""
     
     def __init__(self):
         """Initialize the status section."""
-        logging.debug("Initializing StatusSection.")
+        logger.debug("Initializing StatusSection.")
         self.layout = QVBoxLayout()
         self._create_status()
         
     def _create_status(self):
         """Create and setup the status display."""
-        logging.debug("Creating status display group.")
+        logger.debug("Creating status display group.")
         self.group = QGroupBox("Status")
         self.group.setFixedHeight(100)
         status_layout = QVBoxLayout()
@@ -24,15 +24,20 @@ class StatusSection:
         self.group.setLayout(status_layout)
         self.group.setStyleSheet("color: rgb(230, 180, 255);")
         self.layout.addWidget(self.group)
-        logging.debug("Status display group created.")
+        logger.debug("Status display group created.")
 
     def update_status(self, avg_brightness, adjusted_brightness):
-        logging.debug(
-            f"Updating status with average brightness: {avg_brightness:.2f} "
-            f"and adjusted brightness: {adjusted_brightness:.2f}%"
-        )
-        self.status_label.setText(
-            f"Average Brightness: {avg_brightness:.2f}\n"
-            f"Adjusted Brightness: {adjusted_brightness:.2f}%"
-        )
-        logging.debug("Status updated successfully.")
+        with metrics.time("ui_update"):
+            logger.debug(
+                "Updating status with average brightness: %.2f and adjusted brightness: %.2f%%",
+                avg_brightness, adjusted_brightness,
+            )
+            self.status_label.setText(
+                f"Average Brightness: {avg_brightness:.2f}\n"
+                f"Adjusted Brightness: {adjusted_brightness:.2f}%"
+            )
+            logger.debug("Status updated successfully.")
+
+    def show_error(self, message):
+        """Show an error in place of the status until the next update."""
+        self.status_label.setText(f"Error setting brightness:\n{message}")
@@ -0,0 +1,73 @@
+"""Send commands to a running Glimmer (UI or headless) over its control socket.
+
+    python src/control.py status
+    python src/control.py set_brightness value=40
+    python src/control.py pause + set_theme theme=Outdoor   # one batch
+
+Commands: status, metrics [format=prometheus], logs [limit=N], pause, resume,
+set_brightness value=N, set_theme theme=NAME. Values are read as JSON when
+possible. Each reply is printed as one JSON line; the exit status is 1 if
+any command failed.
+"""
+import argparse
+import json
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(project_root))
+sys.path.insert(0, project_root)
+
+from src.utils.control_server import default_socket_path, send_commands
+
+
+def parse_commands(words):
+    """Turn ``["pause", "+", "set_brightness", "value=40"]`` into request objects."""
+    requests = []
+    current = None
+    for word in words:
+        if word == "+":
+            current = None
+        elif current is None:
+            current = {"command": word}
+            requests.append(current)
+        else:
+            key, separator, value = word.partition("=")
+            if not separator:
+                raise ValueError(f"Expected key=value after '{current['command']}', got '{word}'")
+            try:
+                current[key] = json.loads(value)
+            except ValueError:
+                current[key] = value
+    if current is None:
+        raise ValueError("Missing command")
+    return requests
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Control a running Glimmer.")
+    parser.add_argument("--socket", default=None, help="control socket (default: see GLIMMER_CONTROL_SOCKET)")
+    parser.add_argument("words", nargs="+", metavar="command [key=value ...] [+ command ...]")
+    args = parser.parse_args(argv)
+
+    try:
+        requests = parse_commands(args.words)
+    except ValueError as e:
+        parser.error(str(e))
+    path = args.socket or default_socket_path()
+    if path is None:
+        print("The control socket is disabled", file=sys.stderr)
+        return 2
+
+    try:
+        replies = send_commands(requests, path)
+    except OSError as e:
+        print(f"Error connecting to Glimmer at {path}: {e}", file=sys.stderr)
+        return 2
+    for reply in replies:
+        print(json.dumps(reply))
+    return 0 if all(reply.get("ok") for reply in replies) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,12 @@
-from .brightness_controller import BrightnessController
\ No newline at end of file
+from .ambient import AmbientGate, AmbientLightSensor, ambient_level, create_ambient_sensor
+from .backlight import MemoryBacklight, SbcBacklight, SysfsBacklight, create_backlight
+from .brightness_controller import BrightnessController
+from .calibration import Calibration, calibrate, corrections_from_trace, target_brightness_grid
+from .capture import CaptureBackend, create_capture_backend
+from .displays import Display, detect_displays
+from .luminance import (
+    METERING_MODES, LumaHistogram, LuminanceEstimator, TileLuminanceTracker, luma_mean, luma_sum,
+    luminance_grid, metered_luminance, metering_weights,
+)
+from .trace import TraceRecorder, read_trace, replay_trace
+from .transition import ImmediateTransition, TransitionEngine
\ No newline at end of file
@@ -0,0 +1,208 @@
+import math
+import os
+import time
+from typing import Callable, Optional
+
+from ..utils.logs import get_logger
+
+logger = get_logger("ambient")
+
+IIO_DEVICES_ROOT = "/sys/bus/iio/devices"
+
+
+def _read_float(fd: int) -> float:
+    # Offset 0 makes sysfs take a new reading on every read of the same descriptor
+    return float(os.pread(fd, 32, 0).split()[0])
+
+
+class AmbientLightSensor:
+    """Reads ambient light in lux from an IIO sensor under ``/sys/bus/iio/devices``.
+
+    The first device with an ``in_illuminance_input`` (already in lux) or
+    ``in_illuminance_raw`` file is used; raw readings are converted with the
+    device's ``in_illuminance_offset`` and ``in_illuminance_scale``. The
+    file stays open, so a reading is a single system call.
+    """
+
+    def __init__(self, root: str = IIO_DEVICES_ROOT, device: Optional[str] = None):
+        """
+        Find and open a light sensor under ``root``.
+
+        Args:
+            root (str): Directory holding one directory per IIO device; point
+                it at a fake tree for tests.
+            device (str, optional): Directory name (e.g. "iio:device0") or
+                ``name`` of the device to use; the first light sensor when omitted.
+
+        Raises:
+            OSError: If there is no readable light sensor.
+        """
+        self.root = root
+        self.device = None
+        self.scale = 1.0
+        self.offset = 0.0
+        self._fd = None
+        try:
+            names = sorted(os.listdir(root))
+        except OSError as e:
+            raise OSError(f"No IIO devices under {root}: {e}") from e
+
+        errors = []
+        for name in names:
+            path = os.path.join(root, name)
+            if device is not None and device not in (name, self._device_name(path)):
+                continue
+            try:
+                self._open(path)
+            except (OSError, ValueError) as e:
+                errors.append(f"{name}: {e}")
+                continue
+            self.device = name
+            return
+        raise OSError(f"No ambient light sensor under {root}" + (f" ({'; '.join(errors)})" if errors else ""))
+
+    @staticmethod
+    def _device_name(path):
+        try:
+            with open(os.path.join(path, "name")) as file:
+                return file.read().strip()
+        except OSError:
+            return None
+
+    def _open(self, path):
+        processed = os.path.join(path, "in_illuminance_input")
+        if os.path.exists(processed):
+            fd = os.open(processed, os.O_RDONLY | os.O_CLOEXEC)
+        else:
+            fd = os.open(os.path.join(path, "in_illuminance_raw"), os.O_RDONLY | os.O_CLOEXEC)
+            for attribute in ("scale", "offset"):
+                try:
+                    with open(os.path.join(path, f"in_illuminance_{attribute}")) as file:
+                        setattr(self, attribute, float(file.read().split()[0]))
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError):
+                    os.close(fd)
+                    raise
+        try:
+            _read_float(fd)
+        except (OSError, ValueError):
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def read(self) -> float:
+        """Current illuminance in lux."""
+        return max(0.0, (_read_float(self._fd) + self.offset) * self.scale)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def create_ambient_sensor(name: Optional[str] = None) -> Optional[AmbientLightSensor]:
+    """
+    Open the ambient light sensor chosen by ``name``.
+
+    Args:
+        name (str, optional): "off", "auto" (the first light sensor, if any)
+            or a device directory or name. Defaults to
+            ``$GLIMMER_AMBIENT_SENSOR``, then "off".
+
+    Returns:
+        AmbientLightSensor: The sensor under ``$GLIMMER_AMBIENT_SENSOR_ROOT``
+        (default ``/sys/bus/iio/devices``), or None when off or when "auto"
+        finds none.
+
+    Raises:
+        OSError: If a named device cannot be opened.
+    """
+    name = name or os.environ.get("GLIMMER_AMBIENT_SENSOR", "off")
+    if name == "off":
+        return None
+    root = os.environ.get("GLIMMER_AMBIENT_SENSOR_ROOT", IIO_DEVICES_ROOT)
+    if name != "auto":
+        return AmbientLightSensor(root, device=name)
+    try:
+        return AmbientLightSensor(root)
+    except OSError as e:
+        logger.info("No ambient light sensor, using the screen alone: %s", e)
+        return None
+
+
+def ambient_level(lux: float, dark: float = 1.0, bright: float = 1000.0) -> float:
+    """
+    Place an illuminance between ``dark`` (0) and ``bright`` (1) lux.
+
+    The scale is logarithmic, like the eye: 10 lux is as far from 1 as 1000
+    is from 100. 1000 lux is an office by a window; direct daylight is
+    far above and clamps to 1.
+    """
+    if lux <= dark:
+        return 0.0
+    return min(1.0, math.log(lux / dark) / math.log(bright / dark))
+
+
+class AmbientGate:
+    """Decides from the light sensor whether a tick needs a screen capture.
+
+    A capture is needed on the first tick, when the illuminance moved by
+    more than ``change_ratio`` (relative, so 2 to 3 lux counts as much as
+    200 to 300) since the last capture, and at least every ``heartbeat``
+    seconds, so changes on screen are still picked up.
+    """
+
+    def __init__(self, change_ratio: float = 0.25, heartbeat: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the gate.
+
+        Args:
+            change_ratio (float): Relative change in lux that triggers a capture.
+            heartbeat (float): Longest time in seconds between captures.
+            clock (callable): Monotonic time source.
+        """
+        if change_ratio <= 0 or heartbeat <= 0:
+            raise ValueError("change_ratio and heartbeat must be positive")
+        self.change_ratio = change_ratio
+        self.heartbeat = heartbeat
+        self.captures = 0
+        self.skips = 0
+        self.reason = "first reading"
+        self._clock = clock
+        self._lux = None
+        self._captured_at = None
+
+    def check(self, lux: float) -> bool:
+        """
+        Whether to capture the screen now. Sets ``reason``.
+
+        Returns:
+            bool: True to capture; the reading is then taken as the new reference.
+        """
+        now = self._clock()
+        if self._lux is None or self._captured_at is None:
+            self.reason = "first reading"
+        elif self._changed(lux):
+            self.reason = "ambient light changed"
+        elif now - self._captured_at >= self.heartbeat:
+            self.reason = "heartbeat"
+        else:
+            self.reason = "ambient light steady"
+            self.skips += 1
+            return False
+        self._lux = lux
+        self._captured_at = now
+        self.captures += 1
+        return True
+
+    def reset(self) -> None:
+        """Capture on the next tick."""
+        self._lux = None
+        self._captured_at = None
+
+    def _changed(self, lux: float) -> bool:
+        # +1 lux keeps the ratio sane in the dark, where readings are 0 or a few lux
+        return abs(math.log((lux + 1) / (self._lux + 1))) > math.log1p(self.change_ratio)
+
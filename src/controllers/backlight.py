@@ -0,0 +1,241 @@
+import os
+from typing import List, NamedTuple, Optional
+
+from ..utils.lazy_import import lazy_import
+from ..utils.logs import get_logger
+from .displays import Display, is_internal
+
+# screen_brightness_control is slow to import, so wait until a brightness is read or written
+sbc = lazy_import("screen_brightness_control")
+logger = get_logger("backlight")
+
+
+class SbcBacklight:
+    """Reads and writes display brightness through ``screen_brightness_control``.
+
+    ``display=None`` reads the first display and writes to every display,
+    matching a bare ``sbc.get_brightness()[0]`` / ``sbc.set_brightness(value)``.
+    """
+
+    name = "sbc"
+
+    def get(self, display: Optional[int] = None) -> int:
+        return sbc.get_brightness(display=display)[0]
+
+    def set(self, value: int, display: Optional[int] = None) -> None:
+        sbc.set_brightness(value, display=display)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBacklight:
+    """Keeps brightness in memory instead of on a display. Used to replay traces."""
+
+    name = "memory"
+
+    def __init__(self, value: int = 50):
+        self.values = {}
+        self.default = value
+        self.writes = 0
+
+    def get(self, display: Optional[int] = None) -> int:
+        return self.values.get(display, self.values.get(None, self.default))
+
+    def set(self, value: int, display: Optional[int] = None) -> None:
+        if display is None:
+            self.values.clear()
+        self.values[display] = value
+        self.writes += 1
+
+    def close(self) -> None:
+        pass
+
+
+SYSFS_BACKLIGHT_ROOT = "/sys/class/backlight"
+
+# Preferred interface first, as recommended by the kernel's backlight documentation
+_SYSFS_TYPE_ORDER = {"firmware": 0, "platform": 1, "raw": 2}
+
+
+class _SysfsDevice(NamedTuple):
+    name: str
+    max_brightness: int
+    brightness_fd: int
+    actual_fd: int  # ``actual_brightness``, or ``brightness`` when the driver has none
+
+
+def _read_int(fd: int) -> int:
+    # Offset 0 makes sysfs regenerate the value on every read of the same descriptor
+    return int(os.pread(fd, 32, 0).split()[0])
+
+
+class SysfsBacklight:
+    """Reads and writes backlight brightness directly through ``/sys/class/backlight``.
+
+    The preferred device (firmware interfaces first) is opened once and its
+    ``brightness`` and ``actual_brightness`` files stay open, so each read
+    or write is a single system call. Values are scaled between percent and
+    the device's ``max_brightness``. Laptops often expose the same internal
+    panel through several devices (e.g. ``acpi_video0`` and
+    ``intel_backlight``), so only that one device is used, for the display
+    ``assign_displays`` identifies as the internal panel. Every other
+    display, typically an external monitor, goes to ``fallback``; a write to
+    all displays reaches it only when such monitors are connected.
+    """
+
+    name = "sysfs"
+
+    def __init__(self, root: str = SYSFS_BACKLIGHT_ROOT, fallback=None):
+        """
+        Discover the backlight devices under ``root``.
+
+        Args:
+            root (str): Directory holding one directory per backlight device;
+                point it at a fake tree for tests.
+            fallback: Backlight used for displays without a device, e.g.
+                ``SbcBacklight``. Such displays raise an error when omitted.
+
+        Raises:
+            OSError: If there is no device whose brightness can be written.
+        """
+        self.root = root
+        self.fallback = fallback
+        self.device: Optional[_SysfsDevice] = None
+        # Until ``assign_displays`` says otherwise: a single monitor, the panel, addressed as None
+        self.has_panel = True
+        self.panel_display: Optional[int] = None
+        self.external_displays = False
+        try:
+            names = os.listdir(root)
+        except OSError as e:
+            raise OSError(f"No backlight devices under {root}: {e}") from e
+
+        found = []
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                with open(os.path.join(path, "type")) as file:
+                    kind = file.read().strip()
+            except OSError:
+                kind = "raw"
+            found.append((_SYSFS_TYPE_ORDER.get(kind, len(_SYSFS_TYPE_ORDER)), name, path))
+
+        errors = []
+        for _, name, path in sorted(found):
+            try:
+                self.device = self._open(name, path)
+                break
+            except (OSError, ValueError) as e:
+                errors.append(f"{name}: {e}")
+        if self.device is None:
+            raise OSError(f"No writable backlight device under {root}" + (f" ({'; '.join(errors)})" if errors else ""))
+
+    @staticmethod
+    def _open(name, path):
+        with open(os.path.join(path, "max_brightness")) as file:
+            max_brightness = int(file.read().split()[0])
+        if max_brightness <= 0:
+            raise ValueError(f"max_brightness is {max_brightness}")
+        brightness_fd = os.open(os.path.join(path, "brightness"), os.O_RDWR | os.O_CLOEXEC)
+        try:
+            actual_fd = os.open(os.path.join(path, "actual_brightness"), os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            actual_fd = brightness_fd
+        except OSError:
+            os.close(brightness_fd)
+            raise
+        return _SysfsDevice(name, max_brightness, brightness_fd, actual_fd)
+
+    def assign_displays(self, displays: List[Display]) -> None:
+        """
+        Decide which of the controlled displays the sysfs device drives.
+
+        That is the display on an internal connector (eDP, LVDS, DSI), or the
+        only display when a single monitor covers the whole desktop. With
+        several monitors and no internal connector among them, every display
+        goes to ``fallback``.
+        """
+        panel = next((display for display in displays if is_internal(display)), None)
+        if panel is None and len(displays) == 1 and displays[0].index is None:
+            panel = displays[0]
+        self.has_panel = panel is not None
+        self.panel_display = panel.index if panel is not None else None
+        self.external_displays = any(display != panel for display in displays)
+
+    def _fallback(self, display: Optional[int]):
+        if self.fallback is None:
+            raise ValueError(f"No backlight device for display {display}")
+        return self.fallback
+
+    def _is_panel(self, display: Optional[int]) -> bool:
+        # None addresses the panel too: it is the primary display whenever there is one
+        return self.has_panel and (display is None or display == self.panel_display)
+
+    def get(self, display: Optional[int] = None) -> int:
+        if not self._is_panel(display):
+            return self._fallback(display).get(display)
+        device = self.device
+        return round(_read_int(device.actual_fd) * 100 / device.max_brightness)
+
+    def set(self, value: int, display: Optional[int] = None) -> None:
+        if self._is_panel(display):
+            device = self.device
+            raw = round(min(max(value, 0), 100) * device.max_brightness / 100)
+            # Newline-terminated so a shorter value written over a longer one in a
+            # regular file (a fake tree) still reads back correctly
+            os.pwrite(device.brightness_fd, f"{raw}\n".encode(), 0)
+            if display is not None or not self.external_displays:
+                return
+        # A display without a device, or a write to all displays that must reach the external monitors
+        self._fallback(display).set(value, display)
+
+    def close(self) -> None:
+        device, self.device = self.device, None
+        if device is not None:
+            if device.actual_fd != device.brightness_fd:
+                os.close(device.actual_fd)
+            os.close(device.brightness_fd)
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+BACKLIGHTS = {
+    SbcBacklight.name: SbcBacklight,
+    SysfsBacklight.name: SysfsBacklight,
+    MemoryBacklight.name: MemoryBacklight,
+}
+
+
+def create_backlight(name: Optional[str] = None, **options):
+    """
+    Create a backlight backend by name.
+
+    Args:
+        name (str, optional): One of ``BACKLIGHTS`` or "auto". Defaults to
+            ``$GLIMMER_BACKLIGHT``, then "auto".
+        **options: Passed to the backend constructor.
+
+    Returns:
+        Object with ``get(display)``, ``set(value, display)`` and ``close()``.
+        "auto" uses sysfs when a writable backlight device exists under
+        ``$GLIMMER_BACKLIGHT_ROOT`` (default ``/sys/class/backlight``), with
+        ``screen_brightness_control`` for displays without one, and
+        ``screen_brightness_control`` alone otherwise.
+    """
+    name = name or os.environ.get("GLIMMER_BACKLIGHT", "auto")
+    if name == "auto":
+        root = os.environ.get("GLIMMER_BACKLIGHT_ROOT", SYSFS_BACKLIGHT_ROOT)
+        # Desktops usually have no devices at all; only mention a fallback when there was something to use
+        if os.path.isdir(root) and os.listdir(root):
+            try:
+                return SysfsBacklight(root, fallback=SbcBacklight())
+            except OSError as e:
+                logger.warning("Direct backlight access unavailable, using screen_brightness_control: %s", e)
+        return SbcBacklight()
+
+    if name not in BACKLIGHTS:
+        raise ValueError(f"Unknown backlight '{name}'. Expected one of {sorted(BACKLIGHTS)} or 'auto'")
+    if name == SysfsBacklight.name and "root" not in options and os.environ.get("GLIMMER_BACKLIGHT_ROOT"):
+        options["root"] = os.environ["GLIMMER_BACKLIGHT_ROOT"]
+    return BACKLIGHTS[name](**options)
@@ -1,99 +1,599 @@
-import cv2
-import numpy as np
-from PIL import ImageGrab
-import screen_brightness_control as sbc
-from typing import Tuple, Optional
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
+from ..utils.logs import get_logger
+from ..utils.metrics import metrics
+from .ambient import AmbientGate, ambient_level, create_ambient_sensor
+from .backlight import create_backlight
+from .brightness_state import BrightnessState
+from .capture import create_capture_backend
+from .capture_process import CaptureProcess
+from .displays import Display, detect_displays
+from .luminance import (
+    METERING_MODES, LumaHistogram, LuminanceEstimator, TileLuminanceTracker, luminance_grid, metered_luminance,
+)
+from .trace import EVENT_PAUSE, EVENT_RESUME, TraceRecorder
+from .transition import TransitionEngine
+
+logger = get_logger("controller")
+capture_logger = get_logger("capture")
+
+
+class DisplayPipeline:
+    """Capture region and analysis state of one display."""
+
+    def __init__(self, display: Display, capture=None, tile_tracker: Optional[TileLuminanceTracker] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            display (Display): The display this pipeline measures and controls.
+            capture (CaptureBackend, optional): Backend that captures only this
+                display. When None the display is cut out of the shared frame.
+            tile_tracker (TileLuminanceTracker, optional): Incremental tracker;
+                the controller's estimator is used when None.
+        """
+        self.display = display
+        self.capture = capture
+        self.tile_tracker = tile_tracker
+        self.frame_changed = True
+        self.mean_luminance = None  # Mean luma of the latest frame, before metering
+        self.luminance_map = None  # Latest per-cell mean luma grid, when one was computed
+        self.histogram = LumaHistogram()
+        self.process_result = None  # Latest CaptureResult when a capture process is used
+        self.last_brightness = None
+        self.error_count = 0
+        self.last_adjustment = None
+        self.applied = False
+
+    def reset(self) -> None:
+        """Forget the last result so the next tick recomputes and re-applies it."""
+        self.last_adjustment = None
+        self.applied = False
+
 
 class BrightnessController:
-    
-    def __init__(self, parent):
-        """Initialize the brightness controller with default settings."""
+
+    def __init__(self, parent, capture_backend: Optional[str] = None, displays: Optional[List[Display]] = None,
+                 capture_process: Optional[bool] = None, backlight: Optional[str] = None,
+                 ambient_sensor: Optional[str] = None):
+        """Initialize the brightness controller with default settings.
+
+        Args:
+            parent: Owner of the controller, usually the UI.
+            capture_backend (str, optional): Name of the screen capture backend,
+                see ``create_capture_backend``.
+            displays (list, optional): Displays to control. Detected with
+                ``detect_displays`` when omitted.
+            capture_process (bool, optional): Capture and reduce frames in a
+                separate process, see ``set_capture_process``. Defaults to
+                ``$GLIMMER_CAPTURE_PROCESS``.
+            backlight (str, optional): Name of the backlight backend, see
+                ``create_backlight``.
+            ambient_sensor (str, optional): Ambient light sensor, see
+                ``create_ambient_sensor``. With one, the room's light is
+                blended into the target and the screen is only captured
+                when ``ambient_gate`` asks for it.
+        """
         self.parent = parent
         self.paused = False
         self.max_brightness_limit = 80  # Default maximum brightness
         self.min_brightness_limit = 20  # Default minimum brightness
-        
+        self.on_manual_override = None  # Called when a manual brightness change is detected
+        self.on_manual_error = None  # Called with the exception when a queued manual write fails
+        self.current_manual_brightness = None  # Last brightness set by hand
+        self.estimator = LuminanceEstimator()
+        self.tile_tracking = (18, 32, 8)  # Tile grid used instead of the estimator when set
+        self.metering = "average"  # How the luminance map is weighted, see ``metering_weights``
+        self.metric = "mean"  # Brightness statistic fed to the target, see ``LumaHistogram.metric``
+        self.histogram_sampler = LuminanceEstimator("stride")  # Sample the histogram is built from
+        self.display_results = {}  # Latest (average, target) per display index
+        self.brightness_state = BrightnessState(create_backlight(backlight))
+        self.transition = TransitionEngine(self.brightness_state)
+        self.ambient_sensor = create_ambient_sensor(ambient_sensor)
+        self.ambient_gate = AmbientGate()
+        self.ambient_weight = 0.5  # Share of the room's light in the target when there is a sensor
+        self.ambient_lux = None  # Latest sensor reading
+        self._ambient_level = None  # Room light on a 0-1 scale at the latest capture, see ``ambient_level``
+        # Slider drags: only the latest value is kept, written off the GUI thread at a capped rate
+        self.manual_writer = TransitionEngine(self.brightness_state, duration=0, max_writes_per_second=10.0,
+                                              on_error=self._manual_write_failed)
+        self.capture = create_capture_backend(capture_backend)
+        if capture_process is None:
+            capture_process = os.environ.get("GLIMMER_CAPTURE_PROCESS", "").lower() in ("1", "true", "yes")
+        self.use_capture_process = capture_process
+        self.capture_process = None  # Started on the first tick when ``use_capture_process`` is set
+        self.recorder = None  # TraceRecorder of ticks and events, see ``start_recording``
+        self._tick_time = 0.0
+        if os.environ.get("GLIMMER_TRACE_FILE"):
+            self.start_recording(os.environ["GLIMMER_TRACE_FILE"])
+        self._executor = None
+        self.set_displays(displays if displays is not None else detect_displays())
+
     def set_brightness_limits(self, max_brightness: int, min_brightness: int) -> None:
         if not 0 <= min_brightness <= max_brightness <= 100:
             raise ValueError(
                 "Invalid brightness limits. Must be: 0 <= min <= max <= 100"
             )
-        
+
         self.max_brightness_limit = max_brightness
         self.min_brightness_limit = min_brightness
-        
+
+    def set_displays(self, displays: List[Display]) -> None:
+        """
+        Choose the displays to control, one pipeline each.
+
+        With more than one display and a backend that can capture a region,
+        every display gets its own capture backend so the captures run
+        concurrently; otherwise one shared frame is captured and cut up.
+        """
+        if not displays:
+            raise ValueError("At least one display is required")
+        self._close_pipelines()
+        self._close_capture_process()
+        assign_displays = getattr(self.brightness_state.backend, "assign_displays", None)
+        if assign_displays is not None:
+            assign_displays(displays)
+
+        own_capture = (
+            len(displays) > 1 and getattr(self.capture, "supports_region", False) and not self.use_capture_process
+        )
+        if len(displays) > 1 and hasattr(self.capture, "all_screens"):
+            # The shared frame is cut up per display, so it must span every monitor
+            self.capture.all_screens = True
+        self.pipelines = [
+            DisplayPipeline(
+                display,
+                create_capture_backend(self.capture.name, region=display.region) if own_capture else None,
+                self._create_tile_tracker(),
+            )
+            for display in displays
+        ]
+        self.display_results = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=len(displays), thread_name_prefix="glimmer-display")
+            if len(displays) > 1 else None
+        )
+
+    @property
+    def frame_changed(self) -> bool:
+        """Whether any display's last frame differed from the one before."""
+        return any(pipeline.frame_changed for pipeline in self.pipelines)
+
+    def set_capture_backend(self, name: str, **options) -> None:
+        """Replace the screen capture backend, releasing the previous one."""
+        backend = create_capture_backend(name, **options)
+        self.capture.close()
+        self.capture = backend
+        self.set_displays([pipeline.display for pipeline in self.pipelines])
+
+    def set_capture_process(self, enabled: bool) -> None:
+        """
+        Capture and reduce frames in a separate process.
+
+        The child process writes only per-display statistics (mean, luminance
+        map and histogram) to shared memory, so capture never stalls this
+        process. It is started on the next tick and restarted if it crashes.
+        """
+        self.use_capture_process = enabled
+        self.set_displays([pipeline.display for pipeline in self.pipelines])
+
+    def start_recording(self, path: str) -> None:
+        """Append every tick and pause, resume and override event to a trace file, see ``TraceRecorder``."""
+        self.stop_recording()
+        self.recorder = TraceRecorder(path)
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def set_sampling(self, mode: str, max_samples: int = 16384) -> None:
+        """Estimate the average brightness per frame, see ``LuminanceEstimator``. Disables tile tracking."""
+        self.estimator = LuminanceEstimator(mode, max_samples)
+        self.tile_tracking = None
+        self._reset_trackers()
+
+    def set_tile_tracking(self, rows: int = 18, cols: int = 32, probes: int = 8) -> None:
+        """Track the average brightness incrementally, see ``TileLuminanceTracker``."""
+        self.tile_tracking = (rows, cols, probes)
+        self._reset_trackers()
+
+    def set_metering(self, mode: str) -> None:
+        """Choose how screen regions are weighted, see ``metering_weights``."""
+        if mode not in METERING_MODES:
+            raise ValueError(f"Unknown metering mode '{mode}'. Expected one of {METERING_MODES}")
+        self.metering = mode
+        for pipeline in self.pipelines:
+            pipeline.reset()
+
+    def set_metric(self, metric: str) -> None:
+        """
+        Choose the brightness statistic the target is computed from.
+
+        Args:
+            metric (str): "mean" uses the (metered) average; "median",
+                "contrast" and percentiles such as "p90" are read from a luma
+                histogram of a sample of each frame, see ``LumaHistogram.metric``.
+        """
+        if metric != "mean":
+            LumaHistogram().metric(metric)  # Raises ValueError for unknown metrics
+        self.metric = metric
+        for pipeline in self.pipelines:
+            pipeline.reset()
+
+    def set_transition(self, duration: float = 0.8, easing: str = "ease_in_out",
+                       max_writes_per_second: float = 15.0) -> None:
+        """Configure how brightness changes are faded in. A duration of 0 disables fading."""
+        self.transition.stop()
+        self.transition = TransitionEngine(self.brightness_state, duration, easing, max_writes_per_second)
+
     def pause(self) -> None:
         self.paused = True
-        
+        self.transition.cancel()
+        if self.recorder is not None:
+            self.recorder.record_event(EVENT_PAUSE)
+
     def resume(self) -> None:
         self.paused = False
-        
+        self.manual_writer.cancel()
+        self.ambient_gate.reset()
+        if self.recorder is not None:
+            self.recorder.record_event(EVENT_RESUME)
+        for pipeline in self.pipelines:
+            pipeline.reset()
+        self.brightness_state.invalidate()
+
     def get_average_brightness(self) -> Optional[float]:
+        """Capture every display and return the mean of their average brightness."""
+        frame = self._grab_shared_frame()
+        values = [
+            value for value in self._map(lambda pipeline: self._measure(pipeline, frame))
+            if value is not None
+        ]
+        return sum(values) / len(values) if values else None
+
+    def _grab_shared_frame(self):
+        """Capture the shared frame if any pipeline needs it. Returns None on failure.
+
+        With a capture process, asks it for new results instead and hands each
+        pipeline its own in ``process_result``.
+        """
+        if self.use_capture_process:
+            self._collect_process_results()
+            return None
+        if all(pipeline.capture is not None for pipeline in self.pipelines):
+            return None
+        try:
+            return self.capture.grab()  # Capture the entire screen
+        except Exception as e:
+            capture_logger.error("Error capturing screen: %s", e)
+            return None
+
+    def _collect_process_results(self) -> None:
+        if self.capture_process is None:
+            self.capture_process = CaptureProcess(
+                self.capture.name,
+                [pipeline.display for pipeline in self.pipelines],
+                self.tile_tracking,
+                (self.estimator.mode, self.estimator.max_samples),
+            )
+        try:
+            with metrics.time("capture"):
+                results = self.capture_process.capture()
+        except Exception as e:
+            capture_logger.error("Error capturing screen in the capture process: %s", e)
+            results = [None] * len(self.pipelines)
+        for pipeline, result in zip(self.pipelines, results):
+            pipeline.process_result = result
+
+    def _capture_frame(self, pipeline: DisplayPipeline, shared_frame):
+        """Return the frame of one display and its channel order."""
+        if pipeline.capture is not None:
+            return pipeline.capture.grab(), pipeline.capture.channel_order
+        if shared_frame is None:
+            raise RuntimeError("no frame captured")
+        frame = shared_frame
+        if pipeline.display.region is not None:
+            left, top, width, height = pipeline.display.region
+            frame = frame[top:top + height, left:left + width]
+        return frame, self.capture.channel_order
+
+    def _reduce(self, pipeline: DisplayPipeline, frame, channel_order: str,
+                luminance_map: bool, histogram: bool) -> None:
+        """Update the mean, and optionally the luminance map and histogram, of a display."""
+        if pipeline.tile_tracker is not None:
+            pipeline.frame_changed = pipeline.tile_tracker.update(frame, channel_order)
+            # The tile sums double as the luminance map at no extra cost
+            pipeline.luminance_map = pipeline.tile_tracker.tile_means()
+            pipeline.mean_luminance = pipeline.tile_tracker.mean
+        else:
+            pipeline.frame_changed = True
+            pipeline.mean_luminance = self.estimator.estimate(frame, channel_order)
+            if luminance_map:
+                pipeline.luminance_map = luminance_grid(self.estimator.sample(frame), channel_order=channel_order)
+
+        # An unchanged frame has an unchanged histogram
+        if histogram and (pipeline.frame_changed or not pipeline.histogram.total):
+            pipeline.histogram.update(self.histogram_sampler.sample(frame), channel_order)
+
+    def _reduce_display(self, pipeline: DisplayPipeline, shared_frame) -> bool:
+        """Capture and fully reduce one display, for the capture process. Returns False on failure."""
+        try:
+            frame, channel_order = self._capture_frame(pipeline, shared_frame)
+            self._reduce(pipeline, frame, channel_order, luminance_map=True, histogram=True)
+            return True
+        except Exception as e:
+            pipeline.frame_changed = True
+            capture_logger.error("Error capturing %s: %s", pipeline.display.name or 'screen', e)
+            return False
+
+    def _load_process_result(self, pipeline: DisplayPipeline) -> None:
+        result = pipeline.process_result
+        if result is None:
+            raise RuntimeError("no result from the capture process")
+        pipeline.frame_changed = result.changed
+        pipeline.mean_luminance = result.mean
+        pipeline.luminance_map = result.luminance_map
+        pipeline.histogram.load(result.histogram)
+
+    def _evaluate(self, pipeline: DisplayPipeline) -> float:
+        """Apply metering and the brightness metric to the reduced statistics of a display."""
+        avg_brightness = pipeline.mean_luminance
+        if self.metering != "average":
+            avg_brightness = metered_luminance(pipeline.luminance_map, self.metering)
+        if self.metric != "mean":
+            avg_brightness = pipeline.histogram.metric(self.metric)
+        return avg_brightness
+
+    def _measure(self, pipeline: DisplayPipeline, shared_frame) -> Optional[float]:
+        """Metered brightness of one display, or the last good value after a transient error."""
         try:
-            screen = ImageGrab.grab()  # Capture the entire screen
-            screen_np = np.array(screen)
-            frame = cv2.cvtColor(screen_np, cv2.COLOR_RGB2BGR)
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            avg_brightness = gray_frame.mean()
-            
-            self._last_captured_brightness = avg_brightness
-            self._capture_error_count = 0  # Reset error count on successful capture
+            if self.use_capture_process:
+                self._load_process_result(pipeline)
+            else:
+                frame, channel_order = self._capture_frame(pipeline, shared_frame)
+                with metrics.time("reduction"):
+                    self._reduce(pipeline, frame, channel_order,
+                                 luminance_map=self.metering != "average", histogram=self.metric != "mean")
+            avg_brightness = self._evaluate(pipeline)
+
+            pipeline.last_brightness = avg_brightness
+            pipeline.error_count = 0  # Reset error count on successful capture
             return avg_brightness
-            
+
         except Exception as e:
-            self._capture_error_count += 1
-            print(f"Error capturing screen (attempt {self._capture_error_count}): {e}")
-            
+            pipeline.error_count += 1
+            pipeline.frame_changed = True
+            capture_logger.error("Error capturing %s (attempt %d): %s", pipeline.display.name or 'screen', pipeline.error_count, e)
+
             # Return last known good value if available and not too many errors
-            if self._last_captured_brightness is not None and self._capture_error_count < 3:
-                return self._last_captured_brightness
-                
+            if pipeline.last_brightness is not None and pipeline.error_count < 3:
+                return pipeline.last_brightness
+
             return None
-            
+
     def calculate_target_brightness(self, avg_brightness: float, sensitivity: float, min_brightness, max_brightness) -> Optional[float]:
         try:
-            return min_brightness + (1 - (avg_brightness * sensitivity / 2550)) * (max_brightness - min_brightness)
-            
+            with metrics.time("target"):
+                return min_brightness + (1 - (avg_brightness * sensitivity / 2550)) * (max_brightness - min_brightness)
+
         except Exception as e:
-            print(f"Error calculating target brightness: {e}")
+            logger.error("Error calculating target brightness: %s", e)
             return None
-            
+
     def adjust_brightness(self, prev_target_brightness, sensitivity: int, max_brightness: int, min_brightness: int) -> Tuple[int, int]:
+        """
+        Run one tick on every display, concurrently when there are several.
+
+        Returns:
+            tuple: Average brightness and target brightness, averaged over the
+            displays that produced a result, or ``(0, 0)`` if none did. Per
+            display results are kept in ``display_results``.
+        """
         if self.paused:
             return 0, 0
 
+        self._tick_time = time.time()
+        parameters = (sensitivity, max_brightness, min_brightness)
+        check_override = round(prev_target_brightness) != 0
+        if self._capture_needed(parameters):
+            shared_frame = self._grab_shared_frame()
+            results = self._map(lambda pipeline: self._adjust_display(pipeline, shared_frame, parameters, check_override))
+        else:
+            results = [self._reuse_adjustment(pipeline, parameters, check_override) for pipeline in self.pipelines]
+
+        if any(result == "override" for result in results):
+            self._handle_manual_override()
+            return 0, 0
+
+        self.display_results = {
+            pipeline.display.index: result for pipeline, result in zip(self.pipelines, results) if result is not None
+        }
+        applied = list(self.display_results.values())
+        if not applied:
+            return 0, 0
+        return (
+            sum(avg for avg, _ in applied) / len(applied),
+            sum(target for _, target in applied) / len(applied),
+        )
+
+    def _capture_needed(self, parameters) -> bool:
+        """Read the light sensor, if any, and decide whether this tick captures the screen."""
+        if self.ambient_sensor is None:
+            return True
+        try:
+            self.ambient_lux = self.ambient_sensor.read()
+        except (OSError, ValueError) as e:
+            logger.error("Error reading the ambient light sensor: %s", e)
+            self.ambient_lux = self._ambient_level = None
+            self.ambient_gate.reset()
+            return True
+
+        capture = self.ambient_gate.check(self.ambient_lux)
+        if not capture and all(
+            pipeline.last_adjustment is not None and pipeline.last_adjustment[0] == parameters
+            for pipeline in self.pipelines
+        ):
+            return False
+        if capture and self.ambient_gate.reason == "ambient light changed":
+            for pipeline in self.pipelines:
+                pipeline.last_adjustment = None  # Recompute the target even if the screen did not change
+        self._ambient_level = ambient_level(self.ambient_lux)
+        return True
+
+    def _reuse_adjustment(self, pipeline: DisplayPipeline, parameters, check_override):
+        """The last result of a display, for a tick without a capture. Still notices manual changes."""
+        avg_brightness, target_brightness = pipeline.last_adjustment[1]
+        if check_override and self._override_detected(pipeline, parameters, avg_brightness):
+            return "override"
+        pipeline.frame_changed = False
+        if self.recorder is not None:
+            self._record_tick(pipeline, parameters, avg_brightness, target_brightness, applied=None)
+        return avg_brightness, target_brightness
+
+    def _override_detected(self, pipeline: DisplayPipeline, parameters, avg_brightness) -> bool:
+        # Compared against what was last written, so a fade in progress is not mistaken
+        # for the user; the hardware is only read back every few seconds
+        index = pipeline.display.index
+        if not (pipeline.applied and self.brightness_state.changed_externally(index)):
+            return False
+        if self.recorder is not None:
+            self.recorder.record_override(
+                self._tick_time, index, parameters, pipeline.mean_luminance, avg_brightness,
+                self.brightness_state.get(index),
+            )
+        return True
+
+    def _adjust_display(self, pipeline: DisplayPipeline, shared_frame, parameters, check_override):
+        """One tick for one display. Returns (average, target), "override", or None on failure."""
+        sensitivity, max_brightness, min_brightness = parameters
+        index = pipeline.display.index
+
         # Get ambient brightness
-        avg_brightness = self.get_average_brightness()
+        avg_brightness = self._measure(pipeline, shared_frame)
         if avg_brightness is None:
-            return 0, 0
-            
+            return None
+
+        if check_override and self._override_detected(pipeline, parameters, avg_brightness):
+            return "override"
+
+        # Nothing on screen changed and the settings are the same: keep the last result
+        # without recomputing the target or writing to the hardware
+        if not pipeline.frame_changed and pipeline.last_adjustment is not None and pipeline.last_adjustment[0] == parameters:
+            if self.recorder is not None:
+                self._record_tick(pipeline, parameters, *pipeline.last_adjustment[1], applied=None)
+            return pipeline.last_adjustment[1]
+
         # Calculate target brightness
         target_brightness = self.calculate_target_brightness(avg_brightness, sensitivity, min_brightness, max_brightness)
-        prev_target_brightness = round(prev_target_brightness)
-        current_brightness = sbc.get_brightness()[0]
-        if abs(current_brightness - prev_target_brightness) > 5 and prev_target_brightness!=0:
-            self.parent.toggle_pause()
-            return 0,0
         if target_brightness is None:
-            return 0, 0
-            
+            return None
+
+        # A bright room pulls the target up the range, a bright screen pulls it down
+        if self._ambient_level is not None:
+            ambient_target = min_brightness + self._ambient_level * (max_brightness - min_brightness)
+            target_brightness += self.ambient_weight * (ambient_target - target_brightness)
+
         # Apply brightness limits
         target_brightness = min(max(target_brightness, min_brightness), max_brightness)
-        
+
         try:
-            sbc.set_brightness(int(target_brightness))
+            self.transition.set_target(int(target_brightness), display=index)
+            pipeline.applied = True
+            pipeline.last_adjustment = (parameters, (avg_brightness, target_brightness))
+            if self.recorder is not None:
+                self._record_tick(pipeline, parameters, avg_brightness, target_brightness, int(target_brightness))
             return avg_brightness, target_brightness
-            
+
         except Exception as e:
-            print(f"Error setting brightness: {e}")
-            return 0, 0
-            
+            logger.error("Error setting brightness: %s", e)
+            return None
+
+    def _record_tick(self, pipeline: DisplayPipeline, parameters, avg_brightness, target_brightness, applied):
+        self.recorder.record_tick(
+            self._tick_time, pipeline.display.index, parameters, pipeline.frame_changed,
+            pipeline.mean_luminance, avg_brightness, target_brightness, applied,
+        )
+
+    def _map(self, function):
+        """Apply ``function`` to every pipeline, on the thread pool when there are several."""
+        if self._executor is None:
+            return [function(pipeline) for pipeline in self.pipelines]
+        return list(self._executor.map(function, self.pipelines))
+
+    def _handle_manual_override(self) -> None:
+        # Pause here so a tick that runs before the UI reacts does not fight the user
+        self.pause()
+        for pipeline in self.pipelines:
+            pipeline.reset()
+        if self.on_manual_override is not None:
+            self.on_manual_override()
+
     def set_manual_brightness(self, brightness: int) -> None:
         if not 0 <= brightness <= 100:
             raise ValueError("Brightness must be between 0 and 100")
-            
+
         try:
-            sbc.set_brightness(brightness)
+            self.transition.cancel()
+            self.brightness_state.set(brightness)
             self.current_manual_brightness = brightness
         except Exception as e:
-            print(f"Error setting manual brightness: {e}")
\ No newline at end of file
+            logger.error("Error setting manual brightness: %s", e)
+
+    def queue_manual_brightness(self, brightness: int) -> None:
+        """
+        Set the brightness by hand without waiting for the hardware.
+
+        The value replaces any write still waiting, so a slider drag costs at
+        most ``manual_writer.max_writes_per_second`` writes and always ends
+        on its final value. Failures go to ``on_manual_error``.
+        """
+        if not 0 <= brightness <= 100:
+            raise ValueError("Brightness must be between 0 and 100")
+
+        if self.transition.active:
+            self.transition.cancel()
+        self.manual_writer.set_target(brightness)
+        self.current_manual_brightness = brightness
+
+    def _manual_write_failed(self, error: Exception) -> None:
+        # Called on the writer thread
+        if self.on_manual_error is not None:
+            self.on_manual_error(error)
+
+    def _create_tile_tracker(self) -> Optional[TileLuminanceTracker]:
+        return TileLuminanceTracker(*self.tile_tracking) if self.tile_tracking is not None else None
+
+    def _reset_trackers(self) -> None:
+        self._close_capture_process()  # Its analysis settings are fixed when it starts
+        for pipeline in self.pipelines:
+            pipeline.tile_tracker = self._create_tile_tracker()
+            pipeline.reset()
+
+    def _close_capture_process(self) -> None:
+        if self.capture_process is not None:
+            self.capture_process.close()
+            self.capture_process = None
+
+    def _close_pipelines(self) -> None:
+        for pipeline in getattr(self, "pipelines", []):
+            if pipeline.capture is not None:
+                pipeline.capture.close()
+
+    def close(self) -> None:
+        """Stop background work and release the capture backends."""
+        self.transition.stop()
+        self.manual_writer.stop()
+        self.stop_recording()
+        self._close_capture_process()
+        self._close_pipelines()
+        self.capture.close()
+        self.brightness_state.close()
+        if self.ambient_sensor is not None:
+            self.ambient_sensor.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
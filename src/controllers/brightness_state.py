@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from ..utils.metrics import metrics
+from .backlight import create_backlight
+
+
+class BrightnessState:
+    """Caches the hardware brightness of each display.
+
+    Writes that would not change the cached value are skipped. Reads are
+    served from the cache and only go to the hardware when the cached value
+    is older than ``refresh_interval`` seconds, unknown, or a refresh is
+    requested. Writes update the cached value but not its age, so the
+    hardware is still read back periodically and changes made outside
+    Glimmer (keyboard keys, other tools) are noticed.
+    """
+
+    def __init__(self, backend=None, refresh_interval: float = 3.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the state.
+
+        Args:
+            backend: Object with ``get(display)``, ``set(value, display)`` and
+                ``close()``; defaults to ``create_backlight()``.
+            refresh_interval (float): Maximum age in seconds of a cached read.
+            clock (callable): Monotonic time source, replaceable in tests.
+        """
+        self.backend = backend or create_backlight()
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._values = {}
+        self._read_at = {}
+        self._written = {}
+        self._lock = threading.Lock()
+        # Serialises hardware access so a read-back cannot interleave with a write
+        self._io_lock = threading.RLock()
+        self.reads = 0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    def get(self, display: Optional[int] = None, refresh: bool = False) -> int:
+        """
+        Return the brightness of a display, reading the hardware only if needed.
+
+        Args:
+            display (int, optional): Display index; None means the primary display.
+            refresh (bool): Force a hardware read.
+        """
+        with self._lock:
+            read_at = self._read_at.get(display)
+            if not refresh and read_at is not None and self._clock() - read_at < self.refresh_interval:
+                return self._values[display]
+
+        with self._io_lock, metrics.time("backlight_get"):
+            value = self.backend.get(display)
+        with self._lock:
+            self._values[display] = value
+            self._read_at[display] = self._clock()
+            self.reads += 1
+        return value
+
+    def set(self, value: int, display: Optional[int] = None) -> bool:
+        """
+        Apply a brightness unless it is already the cached value.
+
+        Returns:
+            bool: True if the hardware was written.
+        """
+        value = int(value)
+        with self._lock:
+            if self._values.get(display) == value:
+                self.skipped_writes += 1
+                return False
+
+        with self._io_lock:
+            try:
+                with metrics.time("backlight_set"):
+                    self.backend.set(value, display)
+            except Exception:
+                self.invalidate(display)
+                raise
+            with self._lock:
+                if display is None:
+                    # A write without a display reaches every display
+                    for other in self._values:
+                        self._values[other] = value
+                    for other in self._written:
+                        self._written[other] = value
+                self._values[display] = value
+                self._written[display] = value
+                self.writes += 1
+        return True
+
+    def changed_externally(self, display: Optional[int] = None, tolerance: int = 5) -> bool:
+        """
+        Whether the hardware has drifted from the last value written through this state.
+
+        Only a hardware read can reveal a change, so this returns False until the
+        cached read is older than ``refresh_interval``; it then reads back and
+        compares. Always False before the first write.
+        """
+        with self._io_lock:
+            with self._lock:
+                expected = self._written.get(display)
+                read_at = self._read_at.get(display)
+            if expected is None:
+                return False
+            if read_at is not None and self._clock() - read_at < self.refresh_interval:
+                return False
+            return abs(self.get(display, refresh=True) - expected) > tolerance
+
+    def invalidate(self, display: Optional[int] = None) -> None:
+        """Forget the cached value of a display, or of every display when None."""
+        with self._lock:
+            if display is None:
+                self._values.clear()
+                self._read_at.clear()
+                self._written.clear()
+            else:
+                self._values.pop(display, None)
+                self._read_at.pop(display, None)
+                self._written.pop(display, None)
+
+    def close(self) -> None:
+        """Release the backend, e.g. the open sysfs files."""
+        with self._io_lock:
+            self.backend.close()
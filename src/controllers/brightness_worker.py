@@ -0,0 +1,213 @@
+from PyQt5.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal, pyqtSlot
+from ..utils.logs import get_logger
+from ..utils.metrics import metrics
+from .scheduler import AdaptiveScheduler
+
+logger = get_logger("controller")
+
+
+class BrightnessWorker(QObject):
+    """Runs capture, analysis and hardware writes off the GUI thread.
+
+    The worker lives in its own ``QThread`` and owns the polling timer. The
+    UI talks to it only through queued signals, and results come back through
+    ``brightness_updated`` so no widget is ever touched from the worker thread.
+    Its slots are the only place the controller's state changes, so nothing
+    changes under a running tick. The delay between ticks comes from an
+    ``AdaptiveScheduler``.
+    """
+
+    brightness_updated = pyqtSignal(float, float)
+    manual_override_detected = pyqtSignal()
+    manual_brightness_failed = pyqtSignal(str)
+    schedule_changed = pyqtSignal(int, str)
+    finished = pyqtSignal()
+
+    def __init__(self, controller, scheduler: AdaptiveScheduler = None):
+        """
+        Initialize the worker.
+
+        Args:
+            controller (BrightnessController): Controller that performs the work.
+            scheduler (AdaptiveScheduler, optional): Decides the polling interval.
+        """
+        super().__init__()
+        self.controller = controller
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.prev_target_brightness = 0
+        self.sensitivity = 7
+        self.max_brightness = controller.max_brightness_limit
+        self.min_brightness = controller.min_brightness_limit
+        self.last_result = (0.0, 0.0)  # Average and target of the latest tick
+        self.timer = None
+
+        self.controller.on_manual_override = self.manual_override_detected.emit
+        self.controller.on_manual_error = lambda error: self.manual_brightness_failed.emit(str(error))
+
+    @pyqtSlot()
+    def start(self):
+        """Create the polling timer inside the worker thread and start it."""
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        if not self.controller.paused:
+            self.timer.start(self.scheduler.interval)
+
+    @pyqtSlot()
+    def tick(self):
+        """Run one capture-analyse-apply cycle."""
+        with metrics.time("tick"):
+            avg_brightness, target_brightness = self.controller.adjust_brightness(
+                self.prev_target_brightness,
+                sensitivity=self.sensitivity,
+                max_brightness=self.max_brightness,
+                min_brightness=self.min_brightness,
+            )
+        self.prev_target_brightness = target_brightness
+        self.last_result = (float(avg_brightness), float(target_brightness))
+        self.brightness_updated.emit(float(avg_brightness), float(target_brightness))
+
+        # (0, 0) means the tick was skipped or failed and produced no reading
+        reading = None if (avg_brightness, target_brightness) == (0, 0) else avg_brightness
+        interval = self.scheduler.next_interval(reading, paused=self.controller.paused)
+        self.schedule_changed.emit(interval, self.scheduler.reason)
+        if self.timer is not None and not self.controller.paused:
+            self.timer.start(interval)
+
+    @pyqtSlot(int, int, int)
+    def set_parameters(self, sensitivity, max_brightness, min_brightness):
+        """Update the parameters used on the next tick."""
+        self.sensitivity = sensitivity
+        self.max_brightness = max_brightness
+        self.min_brightness = min_brightness
+
+    @pyqtSlot(str)
+    def set_metering(self, mode):
+        """Choose how screen regions are weighted, see ``BrightnessController.set_metering``."""
+        try:
+            self.controller.set_metering(mode)
+        except ValueError as e:
+            logger.error("Error applying metering: %s", e)
+
+    @pyqtSlot(str)
+    def set_metric(self, metric):
+        """Choose the brightness statistic, see ``BrightnessController.set_metric``."""
+        try:
+            self.controller.set_metric(metric)
+        except ValueError as e:
+            logger.error("Error applying metric: %s", e)
+
+    @pyqtSlot(int)
+    def set_manual_brightness(self, brightness):
+        """Hand a manual brightness to the controller's rate-limited writer."""
+        self.controller.queue_manual_brightness(brightness)
+
+    @pyqtSlot()
+    def pause(self):
+        """Stop polling until ``resume`` is called."""
+        self.controller.pause()
+        self.prev_target_brightness = 0
+        if self.timer is not None:
+            self.timer.stop()
+        self.schedule_changed.emit(self.scheduler.next_interval(None, paused=True), self.scheduler.reason)
+
+    @pyqtSlot()
+    def resume(self):
+        """Restart polling with a fresh manual-override baseline."""
+        self.controller.resume()
+        self.prev_target_brightness = 0
+        self.scheduler.reset()
+        if self.timer is not None:
+            self.timer.start(0)
+
+    @pyqtSlot()
+    def stop(self):
+        """Stop polling and signal that the worker can be torn down."""
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer.deleteLater()
+            self.timer = None
+        self.finished.emit()
+
+
+class BrightnessWorkerThread(QObject):
+    """Owns a ``BrightnessWorker`` and the ``QThread`` it runs in."""
+
+    parameters_changed = pyqtSignal(int, int, int)
+    metering_changed = pyqtSignal(str)
+    metric_changed = pyqtSignal(str)
+    manual_brightness_requested = pyqtSignal(int)
+    pause_requested = pyqtSignal()
+    resume_requested = pyqtSignal()
+    stop_requested = pyqtSignal()
+
+    def __init__(self, controller, scheduler: AdaptiveScheduler = None, parent=None):
+        super().__init__(parent)
+        self._thread = QThread()
+        self._thread.setObjectName("glimmer-brightness")
+        self.controller = controller
+        self.worker = BrightnessWorker(controller, scheduler)
+        self.worker.moveToThread(self._thread)
+
+        self._thread.started.connect(self.worker.start)
+        self.parameters_changed.connect(self.worker.set_parameters)
+        self.metering_changed.connect(self.worker.set_metering)
+        self.metric_changed.connect(self.worker.set_metric)
+        self.manual_brightness_requested.connect(self.worker.set_manual_brightness)
+        self.pause_requested.connect(self.worker.pause)
+        self.resume_requested.connect(self.worker.resume)
+        self.stop_requested.connect(self.worker.stop)
+        # Direct so the thread exits even once the GUI event loop has stopped
+        self.worker.finished.connect(self._thread.quit, Qt.DirectConnection)
+
+        # Convenience aliases for the signals the UI listens to
+        self.brightness_updated = self.worker.brightness_updated
+        self.manual_override_detected = self.worker.manual_override_detected
+        self.manual_brightness_failed = self.worker.manual_brightness_failed
+        self.schedule_changed = self.worker.schedule_changed
+        self.scheduler = self.worker.scheduler
+
+    def status(self) -> dict:
+        """Parameters and latest result of the worker. Safe to call from any thread."""
+        avg_brightness, target_brightness = self.worker.last_result
+        return {
+            "paused": self.controller.paused,
+            "sensitivity": self.worker.sensitivity,
+            "max_brightness": self.worker.max_brightness,
+            "min_brightness": self.worker.min_brightness,
+            "average_brightness": avg_brightness,
+            "target_brightness": target_brightness,
+            "ambient_lux": self.controller.ambient_lux,
+            "interval_ms": self.scheduler.interval,
+            "reason": self.scheduler.reason,
+        }
+
+    def start(self):
+        self._thread.start()
+
+    def set_parameters(self, sensitivity, max_brightness, min_brightness):
+        self.parameters_changed.emit(sensitivity, max_brightness, min_brightness)
+
+    def set_metering(self, mode):
+        self.metering_changed.emit(mode)
+
+    def set_metric(self, metric):
+        self.metric_changed.emit(metric)
+
+    def set_manual_brightness(self, brightness):
+        self.manual_brightness_requested.emit(brightness)
+
+    def pause(self):
+        self.pause_requested.emit()
+
+    def resume(self):
+        self.resume_requested.emit()
+
+    def shutdown(self, timeout_ms: int = 3000):
+        """Stop the worker and wait for its thread to exit."""
+        if self._thread.isRunning():
+            self.stop_requested.emit()
+            if not self._thread.wait(timeout_ms):
+                self._thread.terminate()
+                self._thread.wait()
+        self.controller.close()
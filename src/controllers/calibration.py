@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from ..utils.lazy_import import lazy_import
+from .trace import EVENT_OVERRIDE, NO_VALUE
+
+np = lazy_import("numpy")
+
+SENSITIVITIES = range(1, 11)
+BRIGHTNESS_VALUES = range(0, 101)
+
+
+def target_brightness_grid(luminance, sensitivity, min_brightness, max_brightness) -> np.ndarray:
+    """
+    Vectorized ``BrightnessController.calculate_target_brightness`` followed by the limit clamp.
+
+    All arguments broadcast against each other, so a whole parameter grid is
+    evaluated against many luminance samples in one call, e.g.::
+
+        target_brightness_grid(samples, s[:, None, None, None], lo[:, None, None], hi[:, None])
+
+    gives one target per sensitivity, minimum, maximum and sample. Results
+    match the scalar path wherever ``min_brightness <= max_brightness``.
+
+    Args:
+        luminance (array_like): Average brightness of the screen, 0-255.
+        sensitivity (array_like): Sensitivity from 1 to 10.
+        min_brightness (array_like): Lower brightness limit in percent.
+        max_brightness (array_like): Upper brightness limit in percent.
+
+    Returns:
+        np.ndarray: Target brightness in percent, as float64.
+    """
+    luminance = np.asarray(luminance, dtype=np.float64)
+    min_brightness = np.asarray(min_brightness, dtype=np.float64)
+    max_brightness = np.asarray(max_brightness, dtype=np.float64)
+    target = min_brightness + (1 - luminance * np.asarray(sensitivity, dtype=np.float64) / 2550) * (
+        max_brightness - min_brightness
+    )
+    return np.minimum(np.maximum(target, min_brightness), max_brightness)
+
+
+class Calibration(NamedTuple):
+    """Settings fitted to manual corrections by ``calibrate``."""
+
+    sensitivity: int
+    min_brightness: int
+    max_brightness: int
+    rmse: float  # Root mean square distance in percent from the corrections
+    samples: int
+
+
+def calibrate(luminance, brightness, weights=None, current: Optional[Tuple[int, int, int]] = None,
+              sensitivities: Sequence[int] = SENSITIVITIES,
+              brightness_values: Sequence[int] = BRIGHTNESS_VALUES) -> Calibration:
+    """
+    Find the sensitivity and limits whose targets are closest to the brightness the user chose.
+
+    Every combination of ``sensitivities`` and pairs of ``brightness_values``
+    with minimum below maximum is tried. While the target lies between the
+    limits it is ``min + g * (max - min)`` with ``g`` depending only on
+    luminance and sensitivity, so the squared error of every limit pair
+    follows from six sums per sensitivity. The cost grows with the number of
+    corrections times sensitivities plus the grid size, never their product.
+
+    Args:
+        luminance (array_like): Luminance measured at each correction, 0-255.
+        brightness (array_like): Brightness the user set at each correction.
+        weights (array_like, optional): Weight of each correction.
+        current (tuple, optional): ``(sensitivity, min_brightness, max_brightness)``
+            in use; among nearly equal fits the closest one wins, which
+            keeps settings stable when there are only a few corrections.
+        sensitivities (sequence): Sensitivities to try.
+        brightness_values (sequence): Limits to try, in percent.
+
+    Returns:
+        Calibration: The best combination and how well it fits.
+
+    Raises:
+        ValueError: If there are no corrections.
+    """
+    luminance = np.asarray(luminance, dtype=np.float64).ravel()
+    brightness = np.asarray(brightness, dtype=np.float64).ravel()
+    if len(luminance) == 0:
+        raise ValueError("Calibration needs at least one manual correction")
+    weights = np.ones_like(luminance) if weights is None else np.asarray(weights, dtype=np.float64).ravel()
+
+    sensitivity = np.asarray(sensitivities, dtype=np.float64)
+    limits = np.asarray(brightness_values, dtype=np.float64)
+
+    # Share of the way from the minimum to the maximum, per sensitivity and correction
+    g = np.clip(1 - luminance * sensitivity[:, None] / 2550, 0, 1)
+    h = 1 - g
+    sums = [
+        (weights * a).sum(axis=1)[:, None, None]
+        for a in (h * h, h * g, g * g, h * brightness, g * brightness)
+    ]
+    hh, hg, gg, hb, gb = sums
+    bb = (weights * brightness * brightness).sum()
+
+    low = limits[None, :, None]
+    high = limits[None, None, :]
+    error = low * low * hh + 2 * low * high * hg + high * high * gg - 2 * low * hb - 2 * high * gb + bb
+    error = np.where(low < high, error, np.inf)
+    if current is not None:
+        # A step away from the current settings costs as much as 0.1 points of error
+        # on one correction: enough to choose among near-equal fits, too little to matter otherwise
+        distance = ((sensitivity[:, None, None] - current[0]) ** 2
+                    + (low - current[1]) ** 2 + (high - current[2]) ** 2)
+        error = error + 0.01 * distance
+
+    best = np.unravel_index(np.argmin(error), error.shape)
+    s, lo, hi = int(sensitivity[best[0]]), int(limits[best[1]]), int(limits[best[2]])
+    residual = target_brightness_grid(luminance, s, lo, hi) - brightness
+    return Calibration(
+        sensitivity=s,
+        min_brightness=lo,
+        max_brightness=hi,
+        rmse=float(np.sqrt((weights * residual * residual).sum() / weights.sum())),
+        samples=len(luminance),
+    )
+
+
+def corrections_from_trace(trace: np.ndarray, settle: float = 5.0) -> np.ndarray:
+    """
+    Manual corrections recorded in a trace, see ``TraceRecorder.record_override``.
+
+    Args:
+        trace (np.ndarray): Records from ``read_trace``.
+        settle (float): Corrections of one display less than this many
+            seconds apart are one adjustment; only the last is kept.
+
+    Returns:
+        np.ndarray: Override records with a luminance and a brightness, in time order.
+    """
+    overrides = trace[(trace["event"] == EVENT_OVERRIDE) & (trace["applied"] != NO_VALUE)]
+    overrides = overrides[np.isfinite(overrides["luminance"])]
+    keep = np.ones(len(overrides), dtype=bool)
+    for display in np.unique(overrides["display"]):
+        indices = np.flatnonzero(overrides["display"] == display)
+        keep[indices[:-1]] = np.diff(overrides["time"][indices]) >= settle
+    return overrides[keep]
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional, Sequence, Tuple
+
+from ..utils.lazy_import import lazy_import
+from ..utils.logs import get_logger
+from ..utils.metrics import metrics
+
+np = lazy_import("numpy")
+logger = get_logger("capture")
+
+
+class CaptureBackend:
+    """Base class for screen capture backends.
+
+    Subclasses implement ``_grab`` and set ``channel_order`` to the layout of
+    the frames they return. ``grab`` times every capture so each backend
+    reports its own latency.
+    """
+
+    name = "base"
+    channel_order = "RGB"
+    supports_region = False  # Whether the constructor accepts a ``region``
+
+    def __init__(self, history: int = 60):
+        """
+        Initialize the backend.
+
+        Args:
+            history (int): Number of recent capture latencies to keep.
+        """
+        self._latencies = deque(maxlen=history)
+
+    def grab(self) -> np.ndarray:
+        """
+        Capture one frame.
+
+        Returns:
+            np.ndarray: ``(height, width, channels)`` uint8 frame laid out as
+            ``channel_order``. Backends may reuse the buffer between calls, so
+            callers must not keep a frame across grabs.
+        """
+        start = time.perf_counter()
+        frame = self._grab()
+        latency = time.perf_counter() - start
+        self._latencies.append(latency)
+        metrics.observe("capture", latency)
+        return frame
+
+    def _grab(self) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def last_latency(self) -> Optional[float]:
+        """Duration of the most recent capture in seconds."""
+        return self._latencies[-1] if self._latencies else None
+
+    @property
+    def average_latency(self) -> Optional[float]:
+        """Mean duration of the recent captures in seconds."""
+        return sum(self._latencies) / len(self._latencies) if self._latencies else None
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class PILCaptureBackend(CaptureBackend):
+    """Captures the screen with ``PIL.ImageGrab``. Works everywhere Pillow does."""
+
+    name = "pil"
+
+    def __init__(self, all_screens: bool = False, history: int = 60):
+        super().__init__(history)
+        self.all_screens = all_screens
+
+    def _grab(self) -> np.ndarray:
+        from PIL import ImageGrab
+
+        screen = ImageGrab.grab(all_screens=self.all_screens)
+        self.channel_order = screen.mode if screen.mode in ("RGB", "RGBA") else "RGB"
+        if screen.mode not in ("RGB", "RGBA"):
+            screen = screen.convert("RGB")
+        return np.asarray(screen)
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of XImage; only these are read
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+# Xlib has one error handler per process, but backends for several displays grab
+# concurrently, each on its own connection, so errors are counted per connection
+_x_errors = {}
+_x_lock = threading.Lock()
+_xlib_initialised = False
+
+
+@_X_ERROR_HANDLER
+def _record_x_error(display, event):
+    # The default Xlib handler exits the process; record the error instead
+    with _x_lock:
+        _x_errors[display] = _x_errors.get(display, 0) + 1
+    return 0
+
+
+def _take_x_errors(display) -> int:
+    """Number of X errors on ``display`` since the last call."""
+    with _x_lock:
+        return _x_errors.pop(display, 0)
+
+
+class X11ShmCaptureBackend(CaptureBackend):
+    """Captures an X11 screen through the MIT-SHM extension.
+
+    The X server copies the root window straight into a System V shared
+    memory segment that ``grab`` exposes as a NumPy view, so no copy is made
+    on the Python side. The returned frame is overwritten by the next grab.
+    Requires libX11 and libXext; raises ``RuntimeError`` when either the
+    libraries, the display or the extension are unavailable.
+    """
+
+    name = "x11shm"
+    channel_order = "BGRA"
+    supports_region = True
+
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+    _ZPIXMAP = 2
+    _ALL_PLANES = ctypes.c_ulong(-1).value
+
+    def __init__(self, display: Optional[str] = None,
+                 region: Optional[Tuple[int, int, int, int]] = None, history: int = 60):
+        """
+        Initialize the backend.
+
+        Args:
+            display (str, optional): X display name; defaults to ``$DISPLAY``.
+            region (tuple, optional): ``(left, top, width, height)`` to capture
+                instead of the whole root window.
+            history (int): Number of recent capture latencies to keep.
+        """
+        super().__init__(history)
+        self._display = None
+        self._image = None
+        self._shminfo = _XShmSegmentInfo()
+        self._frame = None
+        self._buffer = None
+        self._attached = False
+        self._load_libraries()
+
+        self._display = self._xlib.XOpenDisplay(display.encode() if display else None)
+        if not self._display:
+            raise RuntimeError(f"Cannot open X display {display or os.environ.get('DISPLAY')!r}")
+        try:
+            self._setup(region)
+        except Exception:
+            self.close()
+            raise
+
+    def _load_libraries(self):
+        xlib_path = ctypes.util.find_library("X11")
+        xext_path = ctypes.util.find_library("Xext")
+        if not xlib_path or not xext_path:
+            raise RuntimeError("libX11 and libXext are required for X11 shared-memory capture")
+
+        self._xlib = ctypes.CDLL(xlib_path)
+        self._xext = ctypes.CDLL(xext_path)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+        xlib.XInitThreads.restype = ctypes.c_int
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XFree.argtypes = [ctypes.c_void_p]
+        xlib.XSetErrorHandler.argtypes = [_X_ERROR_HANDLER]
+        xlib.XSetErrorHandler.restype = ctypes.c_void_p
+
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+            ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        global _xlib_initialised
+        with _x_lock:
+            if not _xlib_initialised:
+                # Must come before the first XOpenDisplay: displays are grabbed from a thread pool
+                xlib.XInitThreads()
+                xlib.XSetErrorHandler(_record_x_error)
+                _xlib_initialised = True
+
+    def _setup(self, region):
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+        if not xext.XShmQueryExtension(self._display):
+            raise RuntimeError("The X server does not support the MIT-SHM extension")
+
+        screen = xlib.XDefaultScreen(self._display)
+        self._root = xlib.XRootWindow(self._display, screen)
+        if region is None:
+            region = (0, 0, xlib.XDisplayWidth(self._display, screen), xlib.XDisplayHeight(self._display, screen))
+        self.left, self.top, width, height = region
+
+        image = xext.XShmCreateImage(
+            self._display, xlib.XDefaultVisual(self._display, screen), xlib.XDefaultDepth(self._display, screen),
+            self._ZPIXMAP, None, ctypes.byref(self._shminfo), width, height,
+        )
+        if not image:
+            raise RuntimeError("XShmCreateImage failed")
+        self._image = image
+        if image.contents.bits_per_pixel != 32:
+            raise RuntimeError(f"Unsupported X11 pixel format: {image.contents.bits_per_pixel} bits per pixel")
+
+        size = image.contents.bytes_per_line * height
+        self._shminfo.shmid = libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if self._shminfo.shmid < 0:
+            raise RuntimeError(f"shmget failed: {os.strerror(ctypes.get_errno())}")
+        address = libc.shmat(self._shminfo.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            raise RuntimeError(f"shmat failed: {os.strerror(ctypes.get_errno())}")
+        self._shminfo.shmaddr = address
+        self._shminfo.readOnly = 0
+        image.contents.data = address
+
+        _take_x_errors(self._display)
+        xext.XShmAttach(self._display, ctypes.byref(self._shminfo))
+        xlib.XSync(self._display, 0)
+        if _take_x_errors(self._display):
+            raise RuntimeError("XShmAttach failed; the X server may be remote")
+        self._attached = True
+        # Mark the segment for removal now so it cannot leak if the process dies
+        libc.shmctl(self._shminfo.shmid, self._IPC_RMID, None)
+
+        self._buffer = (ctypes.c_uint8 * size).from_address(address)
+        self._frame_shape = (height, image.contents.bytes_per_line // 4, width)
+
+    def _frame_view(self):
+        # Built on the first grab so that opening the backend does not import NumPy
+        height, row_pixels, width = self._frame_shape
+        return np.ctypeslib.as_array(self._buffer).reshape(height, row_pixels, 4)[:, :width]
+
+    def _grab(self) -> np.ndarray:
+        _take_x_errors(self._display)
+        ok = self._xext.XShmGetImage(
+            self._display, self._root, self._image, self.left, self.top, self._ALL_PLANES,
+        )
+        if not ok or _take_x_errors(self._display):
+            raise RuntimeError("XShmGetImage failed")
+        if self._frame is None:
+            self._frame = self._frame_view()
+        return self._frame
+
+    def close(self) -> None:
+        if self._display is None:
+            return
+        if self._attached:
+            self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._xlib.XSync(self._display, 0)
+            self._attached = False
+        if self._shminfo.shmaddr:
+            self._libc.shmdt(self._shminfo.shmaddr)
+            self._shminfo.shmaddr = None
+        if self._image:
+            # The pixel data lives in shared memory, so only the XImage header is freed
+            self._xlib.XFree(ctypes.cast(self._image, ctypes.c_void_p))
+            self._image = None
+        self._frame = None
+        self._buffer = None
+        self._xlib.XCloseDisplay(self._display)
+        _take_x_errors(self._display)
+        self._display = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """Serves frames from memory or a ``.npy`` file instead of the screen.
+
+    Used for tests and benchmarks. Frames are returned as views and cycled
+    in order; a ``.npy`` file is memory-mapped rather than read up front.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, width: int = 1920, height: int = 1080, frames: Optional[Sequence[np.ndarray]] = None,
+                 path: Optional[str] = None, pattern: str = "gradient", channel_order: str = "RGB",
+                 seed: Optional[int] = None, history: int = 60):
+        """
+        Initialize the backend.
+
+        Args:
+            width (int): Width of generated frames.
+            height (int): Height of generated frames.
+            frames (sequence, optional): Frames to serve, each ``(height, width, channels)``.
+            path (str, optional): ``.npy`` file holding one frame or a stack of frames.
+            pattern (str): Pattern generated when neither ``frames`` nor ``path``
+                is given: "gradient", "noise" or "solid".
+            channel_order (str): Channel layout of the served frames.
+            seed (int, optional): Seed for the "noise" pattern.
+            history (int): Number of recent capture latencies to keep.
+        """
+        super().__init__(history)
+        self.channel_order = channel_order
+        if path is not None:
+            frames = np.load(path, mmap_mode="r")
+            if frames.ndim == 3:
+                frames = frames[np.newaxis]
+        elif frames is None:
+            if pattern not in ("gradient", "noise", "solid"):
+                raise ValueError(f"Unknown synthetic pattern '{pattern}'")
+            # Generated on the first grab, so NumPy is not loaded at startup
+            self._pattern = (pattern, width, height, len(channel_order), seed)
+        if frames is not None and len(frames) == 0:
+            raise ValueError("SyntheticCaptureBackend needs at least one frame")
+        self.frames = frames
+        self._index = 0
+
+    @staticmethod
+    def _generate(pattern, width, height, channels, seed):
+        if pattern == "gradient":
+            row = np.linspace(0, 255, width, dtype=np.float32).astype(np.uint8)
+            return np.ascontiguousarray(np.broadcast_to(row[None, :, None], (height, width, channels)))
+        if pattern == "noise":
+            return np.random.default_rng(seed).integers(0, 256, (height, width, channels), dtype=np.uint8)
+        if pattern == "solid":
+            return np.full((height, width, channels), 128, dtype=np.uint8)
+        raise ValueError(f"Unknown synthetic pattern '{pattern}'")
+
+    def _grab(self) -> np.ndarray:
+        if self.frames is None:
+            self.frames = [self._generate(*self._pattern)]
+        frame = self.frames[self._index]
+        self._index = (self._index + 1) % len(self.frames)
+        return frame
+
+
+CAPTURE_BACKENDS = {
+    PILCaptureBackend.name: PILCaptureBackend,
+    X11ShmCaptureBackend.name: X11ShmCaptureBackend,
+    SyntheticCaptureBackend.name: SyntheticCaptureBackend,
+}
+
+
+def _accepted_options(backend, options):
+    parameters = inspect.signature(backend.__init__).parameters
+    return {key: value for key, value in options.items() if key in parameters}
+
+
+def create_capture_backend(name: Optional[str] = None, **options) -> CaptureBackend:
+    """
+    Create a capture backend by name.
+
+    Args:
+        name (str, optional): One of ``CAPTURE_BACKENDS`` or "auto". Defaults to
+            ``$GLIMMER_CAPTURE_BACKEND``, then "auto".
+        **options: Passed to the backend constructor. With "auto", each
+            candidate gets only the options its constructor accepts.
+
+    Returns:
+        CaptureBackend: "auto" picks the X11 shared-memory backend when it
+        can be initialised and falls back to PIL otherwise.
+    """
+    name = name or os.environ.get("GLIMMER_CAPTURE_BACKEND", "auto")
+    if name == "auto":
+        if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+            try:
+                return X11ShmCaptureBackend(**_accepted_options(X11ShmCaptureBackend, options))
+            except (RuntimeError, OSError) as e:
+                logger.warning("X11 shared-memory capture unavailable, using PIL: %s", e)
+        return PILCaptureBackend(**_accepted_options(PILCaptureBackend, options))
+
+    if name not in CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown capture backend '{name}'. Expected one of {sorted(CAPTURE_BACKENDS)} or 'auto'")
+    return CAPTURE_BACKENDS[name](**options)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+from typing import List, NamedTuple, Optional, Sequence
+
+from ..utils.lazy_import import lazy_import
+from ..utils.logs import get_logger
+from .displays import Display
+
+np = lazy_import("numpy")
+logger = get_logger("capture")
+
+# Grid used for the luminance map when tile tracking is off, as in ``luminance_grid``
+ESTIMATOR_GRID = (9, 16)
+
+
+class CaptureResult(NamedTuple):
+    """Reduced statistics of one display, as produced by the capture process."""
+
+    changed: bool
+    mean: float
+    luminance_map: np.ndarray
+    histogram: np.ndarray
+
+
+def _layout(displays: int, grid, slots: int):
+    header = np.dtype([("write_seq", np.uint64), ("pid", np.int64)])
+    display = np.dtype([
+        ("valid", np.uint8),
+        ("changed", np.uint8),
+        ("mean", np.float64),
+        ("luminance_map", np.float32, grid),
+        ("histogram", np.int64, 256),
+    ])
+    slot = np.dtype([
+        ("seq", np.uint64),
+        ("timestamp", np.float64),
+        ("displays", display, (displays,)),
+        ("seq_end", np.uint64),
+    ])
+    return header, slot, header.itemsize + slot.itemsize * slots
+
+
+def _views(buffer, displays, grid, slots):
+    header_dtype, slot_dtype, _ = _layout(displays, grid, slots)
+    header = np.ndarray((), header_dtype, buffer=buffer)
+    ring = np.ndarray((slots,), slot_dtype, buffer=buffer, offset=header_dtype.itemsize)
+    return header, ring
+
+
+class CaptureProcess:
+    """Runs screen capture and luminance reduction in a child process.
+
+    The child owns the capture backend and the analysis state of every
+    display. On each ``capture`` request it grabs a frame, reduces it, and
+    writes the mean, the luminance map and a luma histogram of every
+    display into the next slot of a ring in ``multiprocessing.shared_memory``.
+    The parent only copies that small record, so frames never cross the
+    process boundary and capture work never holds the parent's GIL.
+
+    Requests and the sequence number of each finished record go over a
+    pipe, which (unlike shared locks) stays usable when the child is killed.
+    Slots are guarded by a sequence number written before and after the
+    record, so a torn read is detected. A child that dies or stops
+    answering is restarted on the next request.
+    """
+
+    def __init__(self, capture_backend: str, displays: Sequence[Display],
+                 tile_tracking: Optional[tuple] = (18, 32, 8), sampling: tuple = ("stratified", 16384),
+                 slots: int = 4, timeout: float = 2.0, start_timeout: float = 15.0):
+        """
+        Initialize the process. It is started by the first ``capture``.
+
+        Args:
+            capture_backend (str): Name of the backend the child creates, see
+                ``create_capture_backend``.
+            displays (sequence): Displays to measure, in pipeline order.
+            tile_tracking (tuple, optional): ``(rows, cols, probes)`` for a
+                ``TileLuminanceTracker``; None uses ``sampling`` instead.
+            sampling (tuple): ``(mode, max_samples)`` for a ``LuminanceEstimator``.
+            slots (int): Number of records in the ring.
+            timeout (float): Seconds to wait for a result before restarting the child.
+            start_timeout (float): Seconds to wait for a freshly started child,
+                which still has to import its dependencies.
+        """
+        self.capture_backend = capture_backend
+        self.displays = list(displays)
+        self.tile_tracking = tile_tracking
+        self.sampling = sampling
+        self.slots = slots
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.grid = tuple(tile_tracking[:2]) if tile_tracking is not None else ESTIMATOR_GRID
+        self.restarts = 0
+
+        # Spawned rather than forked: the parent runs Qt and other threads
+        self._context = multiprocessing.get_context("spawn")
+        _, _, size = _layout(len(self.displays), self.grid, slots)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._header, self._ring = _views(self._shm.buf, len(self.displays), self.grid, slots)
+        self._header["write_seq"] = 0
+        self._process = None
+        self._connection = None
+        self._fresh = False
+        self._started = False
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def start(self) -> None:
+        """Start the child, replacing one that has died or hung."""
+        self._terminate()
+        if self._started:
+            self.restarts += 1
+        self._started = True
+        self._connection, child_connection = self._context.Pipe()
+        config = {
+            "shm_name": self._shm.name,
+            "capture_backend": self.capture_backend,
+            "displays": [tuple(display) for display in self.displays],
+            "tile_tracking": self.tile_tracking,
+            "sampling": self.sampling,
+            "grid": self.grid,
+            "slots": self.slots,
+        }
+        process = self._context.Process(
+            target=_run_child, args=(config, child_connection), name="glimmer-capture", daemon=True,
+        )
+        try:
+            process.start()
+        except BaseException:
+            self._connection.close()
+            raise
+        finally:
+            child_connection.close()
+        # Only a started process is kept, since _terminate cannot join one that never ran
+        self._process = process
+        self._fresh = True
+
+    def capture(self) -> List[Optional[CaptureResult]]:
+        """
+        Have the child capture and reduce one frame, and return its results.
+
+        Returns:
+            list: One ``CaptureResult`` per display, or None for a display
+            whose capture failed in the child.
+
+        Raises:
+            RuntimeError: When the child died or did not answer in time. It is
+                restarted on the next call.
+        """
+        if self._process is None or not self._process.is_alive():
+            if self._process is not None:
+                logger.warning("Capture process exited with code %s, restarting", self._process.exitcode)
+            self.start()
+
+        try:
+            self._connection.send(True)
+            if not self._connection.poll(self.start_timeout if self._fresh else self.timeout):
+                raise TimeoutError
+            seq = self._connection.recv()
+        except TimeoutError:
+            self._terminate()
+            raise RuntimeError("capture process timed out") from None
+        except (EOFError, OSError):
+            self._terminate()
+            raise RuntimeError("capture process died") from None
+        self._fresh = False
+        return self._read(seq)
+
+    def _read(self, seq):
+        record = self._ring[seq % self.slots].copy()
+        if record["seq"] != seq or record["seq_end"] != seq:
+            raise RuntimeError("capture record was overwritten while it was read")
+
+        return [
+            CaptureResult(bool(display["changed"]), float(display["mean"]),
+                          display["luminance_map"].astype(np.float64), display["histogram"])
+            if display["valid"] else None
+            for display in record["displays"]
+        ]
+
+    def _terminate(self):
+        if self._process is None:
+            return
+        try:
+            self._connection.send(None)  # Asks a healthy child to exit
+        except OSError:
+            pass
+        self._connection.close()
+        self._process.join(0.5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join(1)
+        self._process = None
+
+    def close(self) -> None:
+        """Stop the child and release the shared memory."""
+        self._terminate()
+        self._header = self._ring = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _run_child(config, connection):
+    """Entry point of the capture process."""
+    from .brightness_controller import BrightnessController
+
+    shm = shared_memory.SharedMemory(name=config["shm_name"])
+    displays = [Display(*display) for display in config["displays"]]
+    header, ring = _views(shm.buf, len(displays), config["grid"], config["slots"])
+    header["pid"] = os.getpid()
+
+    controller = BrightnessController(
+        None, capture_backend=config["capture_backend"], displays=displays, capture_process=False,
+        backlight="memory",  # The child never touches the hardware brightness
+        ambient_sensor="off",
+    )
+    if config["tile_tracking"] is None:
+        controller.set_sampling(*config["sampling"])
+    else:
+        controller.set_tile_tracking(*config["tile_tracking"])
+
+    try:
+        while True:
+            try:
+                if connection.recv() is None:
+                    return
+            except EOFError:
+                return  # The parent has gone
+
+            shared_frame = controller._grab_shared_frame()
+            outcomes = controller._map(lambda pipeline: controller._reduce_display(pipeline, shared_frame))
+
+            seq = int(header["write_seq"]) + 1
+            slot = ring[seq % config["slots"]]
+            slot["seq_end"] = 0
+            slot["seq"] = seq
+            slot["timestamp"] = time.time()
+            for record, pipeline, ok in zip(slot["displays"], controller.pipelines, outcomes):
+                record["valid"] = ok
+                if ok:
+                    record["changed"] = pipeline.frame_changed
+                    record["mean"] = pipeline.mean_luminance
+                    record["luminance_map"] = pipeline.luminance_map
+                    record["histogram"] = pipeline.histogram.counts
+            slot["seq_end"] = seq
+            header["write_seq"] = seq
+            connection.send(seq)
+    finally:
+        controller.close()
+        del header, ring
+        shm.close()
@@ -0,0 +1,64 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class Display(NamedTuple):
+    """A monitor Glimmer controls.
+
+    Attributes:
+        index: Display index passed to the backlight backend; None addresses
+            every display at once.
+        region: ``(left, top, width, height)`` of the monitor within the
+            captured desktop; None means the whole capture.
+        name: Human readable name, for logs and status.
+    """
+
+    index: Optional[int]
+    region: Optional[Tuple[int, int, int, int]] = None
+    name: str = ""
+
+
+ALL_DISPLAYS = Display(None, None, "all")
+
+# Connector name prefixes of built-in laptop panels, as reported by X11/DRM (e.g. "eDP-1")
+INTERNAL_CONNECTORS = ("eDP", "LVDS", "DSI")
+
+
+def is_internal(display: Display) -> bool:
+    """Whether ``display`` is a built-in panel, judged by its connector name."""
+    return display.name.startswith(INTERNAL_CONNECTORS)
+
+
+def detect_displays() -> List[Display]:
+    """
+    Find the connected monitors and where each one sits on the desktop.
+
+    Uses the optional ``screeninfo`` package. Monitors are matched to
+    backlight display indices in left-to-right, top-to-bottom order, which is
+    the order ``screen_brightness_control`` reports them in on common setups;
+    pass an explicit list to ``BrightnessController`` when it is not.
+
+    Returns:
+        list: One ``Display`` per monitor, or ``[ALL_DISPLAYS]`` when there is
+        a single monitor or the geometry cannot be determined.
+    """
+    try:
+        from screeninfo import get_monitors
+        monitors = get_monitors()
+    except Exception:
+        return [ALL_DISPLAYS]
+
+    if len(monitors) < 2:
+        return [ALL_DISPLAYS]
+
+    # Regions are relative to the top-left corner of the virtual desktop
+    origin_x = min(monitor.x for monitor in monitors)
+    origin_y = min(monitor.y for monitor in monitors)
+    monitors = sorted(monitors, key=lambda monitor: (monitor.x, monitor.y))
+    return [
+        Display(
+            index,
+            (monitor.x - origin_x, monitor.y - origin_y, monitor.width, monitor.height),
+            monitor.name or f"display {index}",
+        )
+        for index, monitor in enumerate(monitors)
+    ]
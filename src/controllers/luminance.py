@@ -0,0 +1,558 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from ..utils.lazy_import import lazy_import
+
+# Imported on the first capture tick rather than at startup
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Fixed-point BT.601 weights, the same ones cv2.COLOR_RGB2GRAY uses. They sum to 1 << LUMA_SHIFT.
+LUMA_WEIGHTS = {"R": 4899, "G": 9617, "B": 1868}
+LUMA_SHIFT = 14
+
+
+def _channel_weights(channel_order: str, channels: int) -> np.ndarray:
+    return np.array([LUMA_WEIGHTS.get(name, 0) for name in channel_order[:channels]], dtype=np.int64)
+
+
+def _is_cv2_compatible(frame: np.ndarray) -> bool:
+    # cv2 accepts row-strided views as long as the pixels of a row are contiguous
+    channels = frame.shape[2]
+    return channels <= 4 and frame.strides[2] == frame.itemsize and frame.strides[1] == channels * frame.itemsize
+
+
+def channel_sums(frame: np.ndarray) -> Tuple[int, ...]:
+    """
+    Sum every channel of a ``(height, width, channels)`` uint8 frame in one pass.
+
+    Frames whose pixels are contiguous within a row, including row-cropped
+    views, are reduced by ``cv2.sumElems`` without copying. Other views, such
+    as column-strided samples, fall back to one NumPy reduction per channel.
+
+    Returns:
+        tuple: Integer sum of each channel.
+    """
+    channels = frame.shape[2]
+    if _is_cv2_compatible(frame):
+        # sumElems accumulates in doubles, which is exact up to 2**53
+        return tuple(int(total) for total in cv2.sumElems(frame)[:channels])
+    return tuple(int(frame[..., c].sum(dtype=np.uint64)) for c in range(channels))
+
+
+def luma_sum(frame: np.ndarray, channel_order: str = "RGB") -> int:
+    """
+    Weighted luma sum of a frame, scaled by ``1 << LUMA_SHIFT``.
+
+    The weights are applied to the per-channel sums, so no BGR or gray frame
+    is ever allocated.
+
+    Args:
+        frame (np.ndarray): ``(height, width, channels)`` uint8 frame.
+        channel_order (str): Channel layout of ``frame``, e.g. "RGB", "BGR" or "BGRA".
+
+    Returns:
+        int: Sum of ``R * 4899 + G * 9617 + B * 1868`` over all pixels.
+    """
+    sums = channel_sums(frame)
+    return sum(LUMA_WEIGHTS[name] * total for name, total in zip(channel_order, sums) if name in LUMA_WEIGHTS)
+
+
+def luma_mean(frame: np.ndarray, channel_order: str = "RGB") -> float:
+    """
+    Mean luma of a frame in the range 0-255.
+
+    ``cv2.cvtColor(..., COLOR_RGB2GRAY).mean()`` rounds every pixel before
+    averaging, so the two differ by at most half a gray level.
+    """
+    pixels = frame.shape[0] * frame.shape[1]
+    if pixels == 0:
+        return 0.0
+    return luma_sum(frame, channel_order) / (pixels << LUMA_SHIFT)
+
+
+def _band_block_sums(band: np.ndarray, col_edges: np.ndarray) -> np.ndarray:
+    """Per-channel sums of the blocks of a horizontal band, as a ``(blocks, channels)`` int64 array."""
+    column_sums = cv2.reduce(band, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).reshape(band.shape[1], -1)
+    return np.add.reduceat(column_sums.astype(np.int64), col_edges[:-1], axis=0)
+
+
+def luminance_grid(frame: np.ndarray, rows: int = 9, cols: int = 16, channel_order: str = "RGB") -> np.ndarray:
+    """
+    Reduce a frame to a coarse grid of mean luma values.
+
+    Every pixel is read once: each band of rows is collapsed to column sums
+    by ``cv2.reduce`` and the columns are then summed per block.
+
+    Args:
+        frame (np.ndarray): ``(height, width, channels)`` uint8 frame.
+        rows (int): Grid rows; clamped to the frame height.
+        cols (int): Grid columns; clamped to the frame width.
+        channel_order (str): Channel layout of ``frame``.
+
+    Returns:
+        np.ndarray: ``(rows, cols)`` float array of mean luma in the range 0-255.
+    """
+    height, width, channels = frame.shape
+    rows, cols = min(rows, height), min(cols, width)
+    if not _is_cv2_compatible(frame):
+        frame = np.ascontiguousarray(frame)
+    row_edges = (np.arange(rows + 1) * height) // rows
+    col_edges = (np.arange(cols + 1) * width) // cols
+    weights = _channel_weights(channel_order, channels)
+
+    sums = np.empty((rows, cols), dtype=np.int64)
+    for row in range(rows):
+        sums[row] = _band_block_sums(frame[row_edges[row]:row_edges[row + 1]], col_edges) @ weights
+    pixels = np.outer(np.diff(row_edges), np.diff(col_edges))
+    return sums / (pixels << LUMA_SHIFT)
+
+
+METERING_MODES = ("average", "center", "spot", "exclude_edges")
+
+
+def is_metric(name: str) -> bool:
+    """Whether ``name`` is a brightness metric: "mean", one of ``LumaHistogram.METRICS`` or "p0" to "p100"."""
+    if name in LumaHistogram.METRICS:
+        return True
+    try:
+        return name.startswith("p") and 0 <= float(name[1:]) <= 100
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=32)
+def metering_weights(mode: str, rows: int, cols: int) -> np.ndarray:
+    """
+    Per-cell weights of a metering mode for a ``rows`` x ``cols`` grid, summing to 1.
+
+    Modes:
+        average: Every cell counts the same.
+        center: Gaussian falloff from the centre (sigma of 30% of each axis).
+        spot: Only the cells within the central 20% of each axis.
+        exclude_edges: Every cell except the outer 10% on each side, where
+            taskbars, docks and title bars usually sit.
+
+    The returned array is cached and read-only.
+    """
+    if mode not in METERING_MODES:
+        raise ValueError(f"Unknown metering mode '{mode}'. Expected one of {METERING_MODES}")
+
+    # Cell centres in normalised coordinates from -0.5 to 0.5
+    ys = (np.arange(rows) + 0.5) / rows - 0.5
+    xs = (np.arange(cols) + 0.5) / cols - 0.5
+    y, x = np.meshgrid(ys, xs, indexing="ij")
+
+    if mode == "average":
+        weights = np.ones((rows, cols))
+    elif mode == "center":
+        weights = np.exp(-(y ** 2 + x ** 2) / (2 * 0.3 ** 2))
+    elif mode == "spot":
+        weights = ((np.abs(y) <= 0.1) & (np.abs(x) <= 0.1)).astype(float)
+        if not weights.any():
+            weights[rows // 2, cols // 2] = 1.0
+    else:
+        weights = ((np.abs(y) <= 0.4) & (np.abs(x) <= 0.4)).astype(float)
+        if not weights.any():
+            weights = np.ones((rows, cols))
+
+    weights /= weights.sum()
+    weights.setflags(write=False)
+    return weights
+
+
+def metered_luminance(grid: np.ndarray, mode: str = "average") -> float:
+    """Weighted luma of a luminance grid under a metering mode."""
+    return float((grid * metering_weights(mode, *grid.shape)).sum())
+
+
+class LuminanceEstimator:
+    """Estimates the mean luma of a screen frame from a subset of its pixels.
+
+    Modes:
+        exact: Reduce every pixel with ``luma_mean``. Kept as the reference
+            the other modes are compared against; it is within half a gray
+            level of the former ``cvtColor`` gray-frame mean.
+        stride: Read a regular grid of pixels, every ``sy``-th row and
+            ``sx``-th column, chosen so that at most ``max_samples`` pixels
+            are read. Deterministic and the cheapest mode, but it has no
+            distribution-free bound: content that repeats with the same period
+            as the grid (e.g. 1px stripes) can be off by up to 255.
+        stratified: Split the frame into ``max_samples`` equal cells and read
+            one uniformly random pixel from each. By Hoeffding's inequality
+            the estimate is within ``255 * sqrt(ln(2 / (1 - confidence)) / (2 * n))``
+            of the exact mean with probability ``confidence``, whatever the
+            content. For the defaults (16384 samples, 0.999) that is 3.9 gray
+            levels, about 1.5% of the full scale.
+        pyramid: Box-downsample the frame by an integer factor so that at most
+            ``max_samples`` pixels remain, and average those. The mean of the
+            block averages equals the exact mean of the area they cover, so
+            the only error comes from the fewer than ``factor`` rows and
+            columns cropped at the edges: at most ``255 * cropped / total``.
+            This mode still reads every pixel but allocates only the small
+            downsampled image.
+    """
+
+    MODES = ("exact", "stride", "stratified", "pyramid")
+
+    def __init__(self, mode: str = "stratified", max_samples: int = 16384,
+                 confidence: float = 0.999, seed: Optional[int] = None):
+        """
+        Initialize the estimator.
+
+        Args:
+            mode (str): One of ``MODES``.
+            max_samples (int): Upper bound on the number of pixels used by the
+                sampling modes.
+            confidence (float): Confidence level used by ``error_bound`` for
+                the stratified mode.
+            seed (int, optional): Seed for the stratified sampler.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown sampling mode '{mode}'. Expected one of {self.MODES}")
+        if max_samples < 1:
+            raise ValueError("max_samples must be at least 1")
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+
+        self.mode = mode
+        self.max_samples = max_samples
+        self.confidence = confidence
+        self._seed = seed
+        self._rng = None  # Created on first use so constructing an estimator does not import NumPy
+
+    def estimate(self, frame: np.ndarray, channel_order: str = "RGB") -> float:
+        """
+        Estimate the mean luma of a frame.
+
+        Args:
+            frame (np.ndarray): ``(height, width, channels)`` uint8 frame.
+            channel_order (str): Channel layout of ``frame``.
+
+        Returns:
+            float: Estimated mean luma in the range 0-255.
+        """
+        return luma_mean(self.sample(frame), channel_order)
+
+    def sample(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Return the pixels the current mode reduces, as an ``(h, w, channels)`` array.
+
+        For ``stride`` this is a view into ``frame``; the other modes return a
+        small new array. ``exact`` returns the frame itself.
+        """
+        height, width = frame.shape[:2]
+        if self.mode == "exact" or height * width <= self.max_samples:
+            return frame
+
+        if self.mode == "stride":
+            sy, sx = self._grid_steps(height, width)
+            return frame[::sy, ::sx]
+
+        if self.mode == "stratified":
+            if self._rng is None:
+                self._rng = np.random.default_rng(self._seed)
+            rows, cols = self._grid_shape(height, width)
+            row_edges = (np.arange(rows + 1) * height) // rows
+            col_edges = (np.arange(cols + 1) * width) // cols
+            ys = row_edges[:-1, None] + (self._rng.random((rows, cols)) * np.diff(row_edges)[:, None]).astype(np.intp)
+            xs = col_edges[None, :-1] + (self._rng.random((rows, cols)) * np.diff(col_edges)[None, :]).astype(np.intp)
+            return frame[ys, xs]
+
+        factor = self.pyramid_factor(height, width)
+        out_h, out_w = height // factor, width // factor
+        # Row-strided views are accepted by cv2 as-is, so cropping does not copy
+        cropped = frame[:out_h * factor, :out_w * factor]
+        return cv2.resize(cropped, (out_w, out_h), interpolation=cv2.INTER_AREA)
+
+    def error_bound(self, frame_shape: Tuple[int, ...]) -> float:
+        """
+        Maximum absolute error of ``estimate`` against the exact mean, in gray levels.
+
+        For ``stratified`` the bound holds with probability ``confidence``;
+        for ``stride`` no content-independent bound exists and 255 is returned.
+        """
+        height, width = frame_shape[:2]
+        total = height * width
+        if self.mode == "exact" or total <= self.max_samples:
+            return 0.0
+        if self.mode == "stride":
+            return 255.0
+        if self.mode == "stratified":
+            rows, cols = self._grid_shape(height, width)
+            n = rows * cols
+            return 255.0 * math.sqrt(math.log(2 / (1 - self.confidence)) / (2 * n))
+
+        factor = self.pyramid_factor(height, width)
+        covered = (height // factor * factor) * (width // factor * factor)
+        # Rounding the block averages adds at most half a level
+        return 255.0 * (total - covered) / total + 0.5
+
+    def pyramid_factor(self, height: int, width: int) -> int:
+        """Smallest integer downsampling factor that leaves at most ``max_samples`` pixels."""
+        factor = max(1, math.ceil(math.sqrt(height * width / self.max_samples)))
+        while (height // factor) * (width // factor) > self.max_samples:
+            factor += 1
+        return factor
+
+    def _grid_steps(self, height: int, width: int) -> Tuple[int, int]:
+        step = self.pyramid_factor(height, width)
+        while math.ceil(height / step) * math.ceil(width / step) > self.max_samples:
+            step += 1
+        return step, step
+
+    def _grid_shape(self, height: int, width: int) -> Tuple[int, int]:
+        """Rows and columns of a near-square cell grid with at most ``max_samples`` cells."""
+        scale = math.sqrt(self.max_samples / (height * width))
+        rows = max(1, min(height, int(height * scale)))
+        cols = max(1, min(width, self.max_samples // rows))
+        return rows, cols
+
+
+class TileLuminanceTracker:
+    """Tracks the mean luma of a frame incrementally, one tile at a time.
+
+    The frame is split into a ``rows`` x ``cols`` grid. Each tile keeps its
+    weighted luma sum and a fingerprint made of ``probes`` x ``probes`` pixels
+    read at fixed positions. On every update only tiles whose fingerprint
+    changed are reduced again and the global sum is patched with the
+    difference, so a moving cursor or a ticking clock costs a handful of tiles
+    instead of the whole frame.
+
+    Changes that fall entirely between probe pixels (narrower than
+    ``tile size / probes``, e.g. a blinking caret) are not seen. Their effect
+    on the mean is tiny, and a full recompute every ``refresh_interval``
+    updates bounds how long such drift can last.
+    """
+
+    def __init__(self, rows: int = 18, cols: int = 32, probes: int = 8, refresh_interval: int = 30):
+        """
+        Initialize the tracker.
+
+        Args:
+            rows (int): Number of tile rows.
+            cols (int): Number of tile columns.
+            probes (int): Probe pixels per tile along each axis.
+            refresh_interval (int): Updates between full recomputes; 0 disables them.
+        """
+        if rows < 1 or cols < 1 or probes < 1:
+            raise ValueError("rows, cols and probes must be at least 1")
+        self.rows = rows
+        self.cols = cols
+        self.probes = probes
+        self.refresh_interval = refresh_interval
+        self.changed_tiles = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all tile state so the next update recomputes every tile."""
+        self._shape = None
+        self._strides = None
+        self._fingerprint = None
+        self.tile_sums = None
+        self.tile_pixels = None
+        self._total = 0
+        self._updates_since_refresh = 0
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean luma of the last frame in the range 0-255, or None before the first update."""
+        if self.tile_sums is None:
+            return None
+        return self._total / (int(self.tile_pixels.sum()) << LUMA_SHIFT)
+
+    def tile_means(self) -> np.ndarray:
+        """Mean luma of every tile as a ``(rows, cols)`` float array."""
+        return self.tile_sums / (self.tile_pixels << LUMA_SHIFT)
+
+    def update(self, frame: np.ndarray, channel_order: str = "RGB") -> bool:
+        """
+        Fold a new frame into the tile state.
+
+        Args:
+            frame (np.ndarray): ``(height, width, channels)`` uint8 frame.
+            channel_order (str): Channel layout of ``frame``.
+
+        Returns:
+            bool: True if any tile changed since the previous update.
+        """
+        if frame.shape != self._shape or frame.strides != self._strides:
+            self._layout(frame)
+
+        # Gather the probes by byte offset; much cheaper than 2-D fancy indexing
+        span = (frame.shape[0] - 1) * frame.strides[0] + (frame.shape[1] - 1) * frame.strides[1] + frame.shape[2]
+        raw = np.lib.stride_tricks.as_strided(frame, shape=(span,), strides=(1,))
+        fingerprint = np.take(raw, self._probe_offsets)
+        self._updates_since_refresh += 1
+        if self._fingerprint is None or (self.refresh_interval and self._updates_since_refresh >= self.refresh_interval):
+            changed = np.ones((self.rows, self.cols), dtype=bool)
+            self._updates_since_refresh = 0
+        else:
+            changed = np.not_equal(fingerprint, self._fingerprint).any(axis=2)
+        self._fingerprint = fingerprint
+
+        self.changed_tiles = int(changed.sum())
+        if not self.changed_tiles:
+            return False
+
+        weights = _channel_weights(channel_order, frame.shape[2])
+        for row in np.flatnonzero(changed.any(axis=1)):
+            self._update_band(frame, row, changed[row], weights)
+        return True
+
+    def _layout(self, frame):
+        height, width, channels = frame.shape
+        if height < self.rows or width < self.cols:
+            raise ValueError(f"Frame {width}x{height} is smaller than the {self.cols}x{self.rows} tile grid")
+        if frame.itemsize != 1 or min(frame.strides) < 0:
+            raise ValueError("TileLuminanceTracker needs a uint8 frame with positive strides")
+        self.reset()
+        self._shape = frame.shape
+        self._strides = frame.strides
+        self._row_edges = (np.arange(self.rows + 1) * height) // self.rows
+        self._col_edges = (np.arange(self.cols + 1) * width) // self.cols
+        probe_rows = self._probe_positions(self._row_edges)
+        probe_cols = self._probe_positions(self._col_edges)
+        offsets = (
+            probe_rows[:, None, None] * frame.strides[0]
+            + probe_cols[None, :, None] * frame.strides[1]
+            + np.arange(channels)[None, None, :] * frame.strides[2]
+        )
+        # Group the probes of each tile together so comparing them is a reduction over the last axis
+        self._probe_offsets = (
+            offsets.reshape(self.rows, self.probes, self.cols, self.probes, channels)
+            .transpose(0, 2, 1, 3, 4)
+            .reshape(self.rows, self.cols, -1)
+        )
+        self.tile_sums = np.zeros((self.rows, self.cols), dtype=np.int64)
+        self.tile_pixels = np.outer(np.diff(self._row_edges), np.diff(self._col_edges)).astype(np.int64)
+
+    def _probe_positions(self, edges):
+        # Probes sit at the centres of ``probes`` equal sub-cells of each tile
+        sizes = np.diff(edges)
+        offsets = (np.arange(self.probes) * 2 + 1) / (2 * self.probes)
+        return (edges[:-1, None] + (sizes[:, None] * offsets[None, :]).astype(np.intp)).ravel()
+
+    def _update_band(self, frame, row, changed_cols, weights):
+        top, bottom = self._row_edges[row], self._row_edges[row + 1]
+        band = frame[top:bottom]
+        if changed_cols.sum() > self.cols // 2:
+            # Reducing the band to column sums in one call beats many per-tile calls
+            tile_sums = _band_block_sums(band, self._col_edges) @ weights
+            new_sums = np.where(changed_cols, tile_sums, self.tile_sums[row])
+        else:
+            new_sums = self.tile_sums[row].copy()
+            for col in np.flatnonzero(changed_cols):
+                left, right = self._col_edges[col], self._col_edges[col + 1]
+                new_sums[col] = int(np.dot(channel_sums(band[:, left:right]), weights))
+        self._total += int(new_sums.sum() - self.tile_sums[row].sum())
+        self.tile_sums[row] = new_sums
+
+
+class LumaHistogram:
+    """A 256-bin luma histogram that is rebuilt in place every tick.
+
+    Per-pixel luma is computed with the same fixed-point weights as
+    ``luma_sum`` into scratch buffers that are kept between updates, and
+    counted straight into the preallocated bins with ``np.add.at``. A
+    strided sample is read in place rather than reshaped, so an update
+    neither copies it nor allocates any per-pixel array. Meant for sampled
+    frames of a few thousand pixels, not full-resolution captures.
+    """
+
+    METRICS = ("mean", "median", "contrast")
+
+    def __init__(self):
+        # Buffers are allocated by the first update, so an unused histogram costs nothing
+        self.counts = None
+        self.total = 0
+        self._luma = None
+        self._term = None
+        self._cumulative = None
+
+    def update(self, sample: np.ndarray, channel_order: str = "RGB") -> None:
+        """
+        Rebuild the histogram from a sample.
+
+        Args:
+            sample (np.ndarray): ``(height, width, channels)`` uint8 pixels.
+            channel_order (str): Channel layout of ``sample``.
+        """
+        height, width, channels = sample.shape
+        count = height * width
+        if self.counts is None:
+            self.counts = np.zeros(256, dtype=np.int64)
+            self._cumulative = np.zeros(256, dtype=np.int64)
+        if self._luma is None or self._luma.shape[0] < count:
+            self._luma = np.empty(count, dtype=np.intp)
+            self._term = np.empty(count, dtype=np.intp)
+        # Scratch views shaped like the sample: reshaping a strided sample instead would copy it
+        luma = self._luma[:count].reshape(height, width)
+        term = self._term[:count].reshape(height, width)
+
+        luma.fill(1 << (LUMA_SHIFT - 1))  # Rounds to nearest like cv2
+        for channel, name in enumerate(channel_order[:channels]):
+            if name in LUMA_WEIGHTS:
+                # Widened first: a mixed-type multiply would go through NumPy's casting buffer
+                np.copyto(term, sample[:, :, channel])
+                np.multiply(term, np.intp(LUMA_WEIGHTS[name]), out=term)
+                np.add(luma, term, out=luma)
+        np.right_shift(luma, LUMA_SHIFT, out=luma)
+
+        self.counts.fill(0)
+        np.add.at(self.counts, luma, 1)
+        np.cumsum(self.counts, out=self._cumulative)
+        self.total = count
+
+    def load(self, counts: np.ndarray) -> None:
+        """Replace the histogram with ``counts``, e.g. one built in another process."""
+        if self.counts is None:
+            self.counts = np.zeros(256, dtype=np.int64)
+            self._cumulative = np.zeros(256, dtype=np.int64)
+        self.counts[:] = counts
+        np.cumsum(self.counts, out=self._cumulative)
+        self.total = int(self._cumulative[-1])
+
+    def percentile(self, q: float) -> float:
+        """Luma below which ``q`` percent of the pixels fall."""
+        if not self.total:
+            return 0.0
+        rank = min(self.total - 1, max(0, math.ceil(q / 100 * self.total) - 1))
+        return float(np.searchsorted(self._cumulative, rank, side="right"))
+
+    def median(self) -> float:
+        return self.percentile(50)
+
+    def mean(self) -> float:
+        if not self.total:
+            return 0.0
+        return float(np.dot(self.counts, np.arange(256)) / self.total)
+
+    def contrast(self) -> float:
+        """Spread between the 5th and 95th percentiles, from 0 (flat) to 1 (black and white)."""
+        return (self.percentile(95) - self.percentile(5)) / 255
+
+    def metric(self, name: str) -> float:
+        """
+        Evaluate a brightness metric.
+
+        Args:
+            name (str): "mean", "median", "contrast" or a percentile such as "p90".
+                "contrast" blends the mean towards the 90th percentile in
+                proportion to ``contrast()``, so small bright areas on a dark
+                screen (subtitles, a lit dialog) count for more than their
+                share of pixels, while low-contrast screens reduce to the mean.
+        """
+        if name == "mean":
+            return self.mean()
+        if name == "median":
+            return self.median()
+        if name == "contrast":
+            weight = self.contrast()
+            return (1 - weight) * self.mean() + weight * self.percentile(90)
+        if name.startswith("p"):
+            return self.percentile(float(name[1:]))
+        raise ValueError(f"Unknown histogram metric '{name}'. Expected one of {self.METRICS} or 'p<percent>'")
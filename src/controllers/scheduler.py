@@ -0,0 +1,131 @@
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, Optional
+
+
+class AdaptiveScheduler:
+    """Chooses how long to wait before the next brightness tick.
+
+    The interval drops to ``min_interval_ms`` as soon as luminance jumps by
+    ``fast_threshold`` or more between two readings, shrinks by ``backoff``
+    while it keeps changing by at least ``change_threshold``, and grows by
+    ``backoff`` up to ``max_interval_ms`` while it is stable. While paused or
+    while the screen is locked it waits ``idle_interval_ms``.
+    """
+
+    def __init__(self, min_interval_ms: int = 250, max_interval_ms: int = 5000,
+                 initial_interval_ms: int = 1000, idle_interval_ms: int = 15000,
+                 backoff: float = 1.5, change_threshold: float = 2.0, fast_threshold: float = 12.0,
+                 lock_probe: Optional[Callable[[], bool]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            min_interval_ms (int): Shortest interval, used during fast scene changes.
+            max_interval_ms (int): Longest interval while actively polling.
+            initial_interval_ms (int): Interval before the first reading.
+            idle_interval_ms (int): Interval while paused or locked.
+            backoff (float): Factor the interval is multiplied or divided by.
+            change_threshold (float): Gray-level change below which luminance counts as stable.
+            fast_threshold (float): Gray-level change that snaps to ``min_interval_ms``.
+            lock_probe (callable, optional): Returns True while the screen is locked.
+        """
+        if not 0 < min_interval_ms <= initial_interval_ms <= max_interval_ms:
+            raise ValueError("Intervals must satisfy 0 < min <= initial <= max")
+        if backoff <= 1:
+            raise ValueError("backoff must be greater than 1")
+
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.initial_interval_ms = initial_interval_ms
+        self.idle_interval_ms = idle_interval_ms
+        self.backoff = backoff
+        self.change_threshold = change_threshold
+        self.fast_threshold = fast_threshold
+        self.lock_probe = lock_probe
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the reading history and return to the initial interval."""
+        self._last_brightness = None
+        self._active_interval = float(self.initial_interval_ms)
+        self.interval = self.initial_interval_ms
+        self.reason = "starting"
+
+    def next_interval(self, avg_brightness: Optional[float], paused: bool = False) -> int:
+        """
+        Compute the delay before the next tick from the latest reading.
+
+        Args:
+            avg_brightness (float, optional): Latest average luminance, or None
+                if the tick produced no reading.
+            paused (bool): Whether automatic control is paused.
+
+        Returns:
+            int: Interval in milliseconds. Also stored in ``interval`` with the
+            reason for the decision in ``reason``.
+        """
+        if paused:
+            return self._decide(self.idle_interval_ms, "paused")
+        if self.lock_probe is not None and self.lock_probe():
+            self._last_brightness = None
+            return self._decide(self.idle_interval_ms, "screen locked")
+        if avg_brightness is None:
+            return self._decide(round(self._active_interval), "no reading")
+
+        previous, self._last_brightness = self._last_brightness, avg_brightness
+        if previous is None:
+            return self._decide(round(self._active_interval), "first reading")
+
+        change = abs(avg_brightness - previous)
+        if change >= self.fast_threshold:
+            self._active_interval = self.min_interval_ms
+            reason = f"fast change ({change:.1f})"
+        elif change >= self.change_threshold:
+            self._active_interval = max(self.min_interval_ms, self._active_interval / self.backoff)
+            reason = f"changing ({change:.1f})"
+        else:
+            self._active_interval = min(self.max_interval_ms, self._active_interval * self.backoff)
+            reason = "stable, backing off" if self._active_interval < self.max_interval_ms else "stable"
+        return self._decide(round(self._active_interval), reason)
+
+    def _decide(self, interval, reason):
+        self.interval = interval
+        self.reason = reason
+        return interval
+
+
+class SessionLockProbe:
+    """Reports whether the current logind session is locked.
+
+    Queries ``loginctl`` at most once per ``ttl`` seconds. Always reports
+    unlocked where logind is not available.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._available = sys.platform.startswith("linux") and shutil.which("loginctl") is not None
+        self._checked_at = None
+        self._locked = False
+
+    def __call__(self) -> bool:
+        if not self._available:
+            return False
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.ttl:
+            self._checked_at = now
+            self._locked = self._query()
+        return self._locked
+
+    def _query(self) -> bool:
+        try:
+            result = subprocess.run(
+                ["loginctl", "show-session", "self", "--property=LockedHint", "--value"],
+                capture_output=True, text=True, timeout=1,
+            )
+        except (OSError, subprocess.SubprocessError):
+            self._available = False
+            return False
+        return result.stdout.strip() == "yes"
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from ..utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+TRACE_MAGIC = b"GLMTRACE"
+TRACE_VERSION = 1
+_HEADER = struct.Struct("<8sHH")  # Magic, version, record size
+
+EVENT_TICK = 0
+EVENT_PAUSE = 1
+EVENT_RESUME = 2
+EVENT_OVERRIDE = 3
+EVENT_NAMES = {EVENT_TICK: "tick", EVENT_PAUSE: "pause", EVENT_RESUME: "resume", EVENT_OVERRIDE: "override"}
+
+NO_DISPLAY = -1  # ``display`` of records that address every display
+NO_VALUE = -1  # ``applied`` of records that wrote nothing
+
+
+@lru_cache(maxsize=None)
+def trace_dtype() -> np.dtype:
+    """
+    Layout of one trace record (28 bytes, little-endian, unpadded).
+
+    Fields:
+        time: Unix time of the tick or event; every display of one tick shares it.
+        event: One of the ``EVENT_*`` constants.
+        display: Display index, or ``NO_DISPLAY``.
+        changed: Whether the frame changed since the previous tick.
+        sensitivity, max_brightness, min_brightness: Parameters of the tick.
+        mean: Mean luma of the frame before metering.
+        luminance: Value the target was computed from, after metering and metric.
+        target: Target brightness, clamped to the limits.
+        applied: Brightness handed to the transition, or ``NO_VALUE`` when the
+            tick reused the previous result without writing.
+
+    Override records of a display keep ``mean`` and ``luminance`` of the
+    tick that detected the override and the brightness the user set in
+    ``applied``, so they can be used to calibrate the settings.
+    """
+    return np.dtype([
+        ("time", "<f8"),
+        ("event", "u1"),
+        ("display", "i1"),
+        ("changed", "u1"),
+        ("sensitivity", "u1"),
+        ("max_brightness", "u1"),
+        ("min_brightness", "u1"),
+        ("mean", "<f4"),
+        ("luminance", "<f4"),
+        ("target", "<f4"),
+        ("applied", "<i2"),
+    ])
+
+
+class TraceRecorder:
+    """Appends controller ticks and events to a binary trace file.
+
+    Records are filled into a preallocated array and written out in blocks
+    of ``buffer_records``, or at least every ``flush_interval`` seconds, so
+    recording costs one row assignment per display and tick. Appending to an
+    existing trace continues it.
+    """
+
+    def __init__(self, path: str, buffer_records: int = 64, flush_interval: float = 30.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Open a trace for appending.
+
+        Args:
+            path (str): Trace file; created with a header if missing or empty.
+            buffer_records (int): Records kept in memory between writes.
+            flush_interval (float): Maximum seconds a record stays unwritten.
+            clock (callable): Time source for events.
+
+        Raises:
+            ValueError: If ``path`` exists but is not a trace of this version.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._buffer = np.zeros(buffer_records, dtype=trace_dtype())
+        self._count = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab+")
+        self._file.seek(0)
+        header = self._file.read(_HEADER.size)
+        if not header:
+            self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, trace_dtype().itemsize))
+            self._file.flush()
+        elif _HEADER.unpack(header) != (TRACE_MAGIC, TRACE_VERSION, trace_dtype().itemsize):
+            self._file.close()
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} Glimmer trace")
+
+    def record_tick(self, timestamp: float, display: Optional[int], parameters, changed: bool, mean: float,
+                    luminance: float, target: float, applied: Optional[int]) -> None:
+        """
+        Record the result of one tick for one display.
+
+        Args:
+            timestamp (float): Unix time of the tick.
+            display (int, optional): Display index; None for every display.
+            parameters (tuple): ``(sensitivity, max_brightness, min_brightness)``.
+            changed (bool): Whether the frame changed.
+            mean (float): Mean luma before metering.
+            luminance (float): Value the target was computed from.
+            target (float): Target clamped to the limits.
+            applied (int, optional): Brightness handed to the transition.
+        """
+        sensitivity, max_brightness, min_brightness = parameters
+        self._append((
+            timestamp, EVENT_TICK, NO_DISPLAY if display is None else display, changed,
+            sensitivity, max_brightness, min_brightness, mean, luminance, target,
+            NO_VALUE if applied is None else applied,
+        ))
+
+    def record_override(self, timestamp: float, display: Optional[int], parameters, mean: float,
+                        luminance: float, brightness: int) -> None:
+        """
+        Record a manual brightness change detected on one display.
+
+        Args:
+            timestamp (float): Unix time of the tick that detected it.
+            display (int, optional): Display index; None for every display.
+            parameters (tuple): ``(sensitivity, max_brightness, min_brightness)`` in effect.
+            mean (float): Mean luma before metering.
+            luminance (float): Value the target would have been computed from.
+            brightness (int): Brightness the user set.
+        """
+        sensitivity, max_brightness, min_brightness = parameters
+        self._append((
+            timestamp, EVENT_OVERRIDE, NO_DISPLAY if display is None else display, False,
+            sensitivity, max_brightness, min_brightness, mean, luminance, np.nan, brightness,
+        ))
+
+    def record_event(self, event: int, display: Optional[int] = None) -> None:
+        """Record a pause, resume or override event."""
+        self._append((
+            self._clock(), event, NO_DISPLAY if display is None else display, False,
+            0, 0, 0, np.nan, np.nan, np.nan, NO_VALUE,
+        ))
+
+    def _append(self, row):
+        with self._lock:
+            if self._file is None:
+                return
+            self._buffer[self._count] = row
+            self._count += 1
+            if self._count == len(self._buffer) or time.monotonic() - self._flushed_at >= self.flush_interval:
+                self._flush()
+
+    def flush(self) -> None:
+        """Write buffered records to the file."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._file is None:
+            return
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self._file.flush()
+            self._count = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and close the file. Later records are dropped."""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path: str) -> np.ndarray:
+    """
+    Load a trace written by ``TraceRecorder``.
+
+    Returns:
+        np.ndarray: Records with ``trace_dtype()``, memory-mapped from the
+        file. A record cut short by a crash is ignored.
+
+    Raises:
+        ValueError: If the file is not a trace of this version.
+    """
+    dtype = trace_dtype()
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size or _HEADER.unpack(header) != (TRACE_MAGIC, TRACE_VERSION, dtype.itemsize):
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} Glimmer trace")
+    count = (os.path.getsize(path) - _HEADER.size) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=_HEADER.size, shape=(count,))
+
+
+def _fill_gray(region: np.ndarray, value: float) -> None:
+    """Fill ``region`` with gray pixels whose mean luma is ``value`` to within 1 / pixel count."""
+    height, width = region.shape[:2]
+    total = int(round(min(max(value, 0.0), 255.0) * height * width))
+    base, extra = divmod(total, height * width)
+    # ``region`` is a column slice of a wider frame, so fill it row by row rather than through a flat view
+    rows, remainder = divmod(extra, width)
+    region[:] = base
+    region[:rows] = base + 1
+    region[rows, :remainder] = base + 1
+
+
+def replay_trace(trace: np.ndarray, sensitivity: Optional[int] = None, max_brightness: Optional[int] = None,
+                 min_brightness: Optional[int] = None, metering: str = "average",
+                 region_size: int = 32) -> Dict[str, object]:
+    """
+    Feed a recorded trace back through a ``BrightnessController``, headless.
+
+    Every tick becomes a small synthetic frame with the recorded mean luma
+    of each display, so the real measurement, target and limit code runs.
+    Brightness goes to an in-memory backlight without fading, and time is
+    taken from the trace, so nothing waits: a day of ticks replays in
+    seconds. Recorded pauses and overrides pause the controller and
+    recorded resumes resume it.
+
+    Args:
+        trace (np.ndarray): Records from ``read_trace``.
+        sensitivity (int, optional): Replaces the recorded sensitivity.
+        max_brightness (int, optional): Replaces the recorded maximum.
+        min_brightness (int, optional): Replaces the recorded minimum.
+        metering (str): Metering mode; the replayed frames are uniform per
+            display, so only "average" reproduces recorded metered values.
+        region_size (int): Side in pixels of each display's synthetic frame.
+
+    Returns:
+        dict: ``results``, a structured array with ``time``, ``display``,
+        ``luminance``, ``recorded_target``, ``target``, ``recorded_applied``
+        and ``applied`` per replayed display tick; ``writes`` to the
+        backlight; ``wall_time`` in seconds and ``speedup`` over real time.
+    """
+    from .backlight import MemoryBacklight
+    from .brightness_controller import BrightnessController
+    from .brightness_state import BrightnessState
+    from .displays import Display
+    from .transition import ImmediateTransition
+
+    ticks = trace[trace["event"] == EVENT_TICK]
+    indices = sorted(set(int(display) for display in ticks["display"])) or [NO_DISPLAY]
+    displays = [
+        Display(None if index == NO_DISPLAY else index, (position * region_size, 0, region_size, region_size),
+                "all" if index == NO_DISPLAY else f"display {index}")
+        for position, index in enumerate(indices)
+    ]
+    position = {index: slot for slot, index in enumerate(indices)}
+    frame = np.zeros((region_size, region_size * len(displays), 3), dtype=np.uint8)
+
+    now = [float(trace["time"][0]) if len(trace) else 0.0]
+    first_applied = ticks["applied"][ticks["applied"] != NO_VALUE]
+    backlight = MemoryBacklight(int(first_applied[0]) if len(first_applied) else 50)
+    state = BrightnessState(backlight, clock=lambda: now[0])
+
+    controller = BrightnessController(None, capture_backend="synthetic", displays=displays, capture_process=False,
+                                      backlight="memory", ambient_sensor="off")
+    try:
+        controller.set_capture_backend("synthetic", frames=[frame])
+        controller.set_sampling("exact")
+        controller.set_metering(metering)
+        controller.transition.stop()
+        controller.brightness_state.close()
+        controller.brightness_state = state
+        controller.transition = ImmediateTransition(state)
+        controller.stop_recording()
+
+        rows = []
+        started = time.perf_counter()
+        times = trace["time"]
+        boundaries = np.flatnonzero(np.diff(times)) + 1
+        for group in np.split(np.arange(len(trace)), boundaries):
+            records = trace[group]
+            now[0] = float(records["time"][0])
+            events = records["event"]
+            if np.any((events == EVENT_PAUSE) | (events == EVENT_OVERRIDE)):
+                controller.pause()
+            if np.any(events == EVENT_RESUME):
+                controller.resume()
+
+            tick = records[events == EVENT_TICK]
+            if len(tick) == 0:
+                continue
+            for record in tick:
+                left = position[int(record["display"])] * region_size
+                _fill_gray(frame[:, left:left + region_size], float(record["mean"]))
+            first = tick[0]
+            controller.adjust_brightness(
+                0,  # Overrides come from the recorded events, not from the in-memory backlight
+                sensitivity=int(first["sensitivity"]) if sensitivity is None else sensitivity,
+                max_brightness=int(first["max_brightness"]) if max_brightness is None else max_brightness,
+                min_brightness=int(first["min_brightness"]) if min_brightness is None else min_brightness,
+            )
+            for record in tick:
+                index = int(record["display"])
+                result = controller.display_results.get(None if index == NO_DISPLAY else index)
+                if result is None:
+                    continue
+                luminance, target = result
+                rows.append((now[0], index, luminance, float(record["target"]), target,
+                             int(record["applied"]), int(target)))
+        wall_time = time.perf_counter() - started
+    finally:
+        controller.close()
+
+    results = np.array(rows, dtype=[
+        ("time", "<f8"), ("display", "i1"), ("luminance", "<f4"), ("recorded_target", "<f4"),
+        ("target", "<f4"), ("recorded_applied", "<i2"), ("applied", "<i2"),
+    ])
+    duration = float(trace["time"][-1] - trace["time"][0]) if len(trace) > 1 else 0.0
+    return {
+        "results": results,
+        "writes": backlight.writes,
+        "wall_time": wall_time,
+        "speedup": duration / wall_time if wall_time > 0 else float("inf"),
+    }
@@ -0,0 +1,208 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from ..utils.logs import get_logger
+
+logger = get_logger("backlight")
+
+EASINGS = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1 - (1 - t) * (1 - t),
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
+
+
+class _Transition:
+    def __init__(self, start_value, target, started_at, duration):
+        self.start_value = start_value
+        self.target = target
+        self.started_at = started_at
+        self.duration = duration
+        self.cancelled = False
+
+    def value_at(self, now, easing):
+        """Return the eased brightness at ``now`` and whether the ramp is finished."""
+        if self.duration <= 0:
+            return self.target, True
+        progress = min(1.0, (now - self.started_at) / self.duration)
+        value = self.start_value + (self.target - self.start_value) * easing(progress)
+        return round(value), progress >= 1.0
+
+
+class TransitionEngine:
+    """Fades display brightness towards a target on a background thread.
+
+    Every display has at most one ramp. A new target replaces the pending one
+    and continues from wherever the old ramp had got to, so superseded targets
+    are never written. Writes go through a ``BrightnessState`` (which drops
+    repeated values) and are spaced at least ``1 / max_writes_per_second``
+    apart.
+    """
+
+    def __init__(self, state, duration: float = 0.8, easing: str = "ease_in_out",
+                 max_writes_per_second: float = 15.0, on_error: Optional[Callable[[Exception], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the engine. The thread starts on the first ``set_target``.
+
+        Args:
+            state (BrightnessState): Where brightness values are written.
+            duration (float): Default ramp length in seconds; 0 jumps straight to the target.
+            easing (str): One of ``EASINGS``.
+            max_writes_per_second (float): Cap on hardware writes across all displays.
+            on_error (callable, optional): Called with the exception when a write fails.
+            clock (callable): Monotonic time source.
+        """
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing '{easing}'. Expected one of {sorted(EASINGS)}")
+        if max_writes_per_second <= 0:
+            raise ValueError("max_writes_per_second must be positive")
+
+        self.state = state
+        self.duration = duration
+        self.easing = easing
+        self.max_writes_per_second = max_writes_per_second
+        self.on_error = on_error
+        self._clock = clock
+        self._transitions = {}
+        self._last_values = {}
+        self._next_write_at = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    @property
+    def active(self) -> bool:
+        """Whether any ramp is in progress."""
+        with self._cond:
+            return bool(self._transitions)
+
+    def set_target(self, value: int, display: Optional[int] = None, duration: Optional[float] = None) -> None:
+        """
+        Start ramping a display towards ``value``, replacing any pending ramp.
+
+        Args:
+            value (int): Target brightness.
+            display (int, optional): Display index; None addresses every display.
+            duration (float, optional): Ramp length for this target; defaults to ``duration``.
+        """
+        duration = self.duration if duration is None else duration
+        with self._cond:
+            now = self._clock()
+            current = self._transitions.get(display)
+            if current is not None:
+                start_value, _ = current.value_at(now, EASINGS[self.easing])
+                current.cancelled = True
+            else:
+                start_value = self._last_values.get(display)
+        if start_value is None and duration > 0:
+            start_value = self.state.get(display)  # A jump has no start, so skip the hardware read
+
+        with self._cond:
+            if self._stopped:
+                return
+            self._transitions[display] = _Transition(start_value, int(value), self._clock(), duration)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def cancel(self, display: Optional[int] = None) -> None:
+        """
+        Abandon the ramp of a display, or of every display when None.
+
+        Returns once any write already in flight has finished, so nothing
+        from the cancelled ramp reaches the hardware afterwards.
+        """
+        with self._cond:
+            displays = list(self._transitions) if display is None else [display]
+            for key in displays:
+                transition = self._transitions.pop(key, None)
+                if transition is not None:
+                    transition.cancelled = True
+                self._last_values.pop(key, None)
+            if display is None:
+                self._last_values.clear()
+        with self._write_lock:
+            pass
+
+    def stop(self) -> None:
+        """Cancel every ramp and stop the thread."""
+        self.cancel()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="glimmer-transition", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        easing = EASINGS[self.easing]
+        while True:
+            with self._cond:
+                while not self._stopped and not self._transitions:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                delay = self._next_write_at - self._clock()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                now = self._clock()
+                steps = []
+                for display, transition in list(self._transitions.items()):
+                    value, finished = transition.value_at(now, easing)
+                    steps.append((display, value, transition))
+                    if finished:
+                        del self._transitions[display]
+                self._next_write_at = now + 1.0 / self.max_writes_per_second
+
+            with self._write_lock:
+                for display, value, transition in steps:
+                    if transition.cancelled:
+                        continue
+                    try:
+                        self.state.set(value, display)
+                        with self._cond:
+                            self._last_values[display] = value
+                    except Exception as e:
+                        self._drop(transition, display)
+                        logger.error("Error setting brightness: %s", e)
+                        if self.on_error is not None:
+                            self.on_error(e)
+
+    def _drop(self, transition, display):
+        # Called from the engine thread, so it must not wait on the write lock
+        with self._cond:
+            transition.cancelled = True
+            if self._transitions.get(display) is transition:
+                del self._transitions[display]
+            self._last_values.pop(display, None)
+
+
+class ImmediateTransition:
+    """Applies targets at once on the calling thread, without fading.
+
+    Has the interface of ``TransitionEngine``, for headless runs such as
+    trace replay where writes must happen before the next tick.
+    """
+
+    active = False
+
+    def __init__(self, state):
+        self.state = state
+
+    def set_target(self, value: int, display: Optional[int] = None, duration: Optional[float] = None) -> None:
+        self.state.set(int(value), display)
+
+    def cancel(self, display: Optional[int] = None) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
@@ -0,0 +1,342 @@
+"""Headless Glimmer: automatic brightness without a window or tray icon.
+
+Drives ``BrightnessController`` from an asyncio event loop and never imports
+PyQt5. Themes, sensitivity, metering and polling intervals come from the
+settings file shared with the UI (see ``src/utils/settings.py``); the
+command line overrides the theme and sensitivity.
+
+    python src/daemon.py --theme Outdoor --sensitivity 6
+
+Signals: SIGINT/SIGTERM shut down cleanly, SIGHUP reloads the settings file,
+SIGUSR1 toggles pause. The control socket (see ``src/control.py``) accepts
+the same commands as in the UI.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from typing import Optional
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(project_root))
+sys.path.insert(0, project_root)
+
+from src.controllers.brightness_controller import BrightnessController
+from src.controllers.scheduler import AdaptiveScheduler, SessionLockProbe
+from src.utils.control_server import ControlServer, default_socket_path, logs_command, metrics_command
+from src.utils.logs import get_logger, setup_logging
+from src.utils.metrics import configure_from_environment, metrics
+from src.utils.settings import settings
+from src.utils.theme_file import load_themes
+
+logger = get_logger()
+
+
+class HeadlessDaemon:
+    """Runs the brightness loop on an asyncio event loop.
+
+    Ticks run one at a time on an executor thread so the loop stays free
+    for signals. When the user changes the brightness by hand, automatic
+    control pauses for ``override_timeout`` seconds and then resumes.
+    """
+
+    def __init__(self, controller: BrightnessController, scheduler: Optional[AdaptiveScheduler] = None,
+                 theme: str = "Indoor", sensitivity: int = 7, override_timeout: float = 600.0,
+                 control_socket: Optional[str] = None):
+        """
+        Initialize the daemon.
+
+        Args:
+            controller (BrightnessController): Controller that performs the work.
+            scheduler (AdaptiveScheduler, optional): Decides the polling interval.
+            theme (str): Theme whose brightness limits are applied.
+            sensitivity (int): Sensitivity from 1 to 10, as on the UI slider.
+            override_timeout (float): Seconds to stay paused after a manual
+                brightness change; 0 stays paused until resumed.
+            control_socket (str, optional): Path of the control socket; None
+                serves no socket.
+        """
+        self.controller = controller
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.theme = theme
+        self.sensitivity = sensitivity
+        self.override_timeout = override_timeout
+        self.control_socket = control_socket
+        self.max_brightness = controller.max_brightness_limit
+        self.min_brightness = controller.min_brightness_limit
+        self.prev_target_brightness = 0
+        self.last_result = (0, 0)
+        self._resume_at = None
+        self._loop = None
+        self._tick = None  # Future of the tick running on the executor
+        self._tasks = set()  # Signal-triggered changes still waiting for a tick to finish
+        self._wake = None
+        self._stopping = False
+
+        self.controller.on_manual_override = self._on_manual_override
+
+    def load_theme(self) -> None:
+        """Apply the brightness limits of ``theme`` from the settings store."""
+        themes = load_themes()
+        if self.theme not in themes:
+            raise ValueError(f"Unknown theme '{self.theme}'. Expected one of {sorted(themes)}")
+        max_brightness, min_brightness = themes[self.theme]
+        self.controller.set_brightness_limits(max_brightness, min_brightness)
+        self.max_brightness = max_brightness
+        self.min_brightness = min_brightness
+        logger.info("Theme %s: brightness %s-%s%%", self.theme, min_brightness, max_brightness)
+
+    def apply_settings(self) -> None:
+        """Apply the saved sensitivity, metering, metric and polling intervals."""
+        self.sensitivity = settings.get("sensitivity")
+        self.controller.set_metering(settings.get("metering"))
+        self.controller.set_metric(settings.get("metric"))
+        for option, value in settings.get("scheduling").items():
+            setattr(self.scheduler, option, value)  # Validated by the settings store
+        self.scheduler.reset()
+
+    async def reload(self) -> None:
+        """Re-read the settings file if it changed, keeping the current limits if the theme is gone."""
+        await self._idle()
+        try:
+            changed = settings.refresh()
+            self.load_theme()
+            if changed:
+                self.apply_settings()
+        except Exception as e:
+            logger.error("Error reloading settings: %s", e)
+        self._notify()
+
+    async def pause(self) -> None:
+        await self._idle()
+        self.controller.pause()
+        self.prev_target_brightness = 0
+        self._resume_at = None
+        self._notify()
+
+    async def resume(self) -> None:
+        await self._idle()
+        self.controller.resume()
+        self.prev_target_brightness = 0
+        self._resume_at = None
+        self.scheduler.reset()
+        self._notify()
+
+    async def toggle_pause(self) -> None:
+        await self._idle()
+        if self.controller.paused:
+            await self.resume()
+        else:
+            await self.pause()
+
+    async def set_theme(self, theme: str) -> None:
+        """Switch to another theme and remember it as the current one."""
+        await self._idle()
+        previous, self.theme = self.theme, theme
+        try:
+            self.load_theme()
+        except Exception:
+            self.theme = previous
+            raise
+        settings.set("theme", theme)
+        self._notify()
+
+    async def set_brightness(self, value: int) -> None:
+        """
+        Set the brightness by hand, which pauses automatic control as a manual change does.
+
+        The write runs on the executor, so slow hardware never blocks the event loop.
+        """
+        if not isinstance(value, int) or not 0 <= value <= 100:
+            raise ValueError("Brightness must be an integer between 0 and 100")
+        await self._idle()
+        self.controller.pause()
+        self._handle_manual_override()
+        await self._loop.run_in_executor(None, self.controller.set_manual_brightness, value)
+
+    def control_handlers(self) -> dict:
+        """Commands served on the control socket."""
+        def act(action):
+            async def handler(**arguments):
+                await action(**arguments)
+                return self.status()
+            return handler
+
+        return {
+            "status": self.status,
+            "metrics": metrics_command,
+            "logs": logs_command,
+            "pause": act(self.pause),
+            "resume": act(self.resume),
+            "set_brightness": act(self.set_brightness),
+            "set_theme": act(self.set_theme),
+        }
+
+    def stop(self) -> None:
+        """Ask the loop to finish; ``run`` returns once the current tick is done."""
+        self._stopping = True
+        self._notify()
+
+    def status(self) -> dict:
+        """Current state, for logging and remote queries."""
+        avg_brightness, target_brightness = self.last_result
+        return {
+            "paused": self.controller.paused,
+            "theme": self.theme,
+            "sensitivity": self.sensitivity,
+            "max_brightness": self.max_brightness,
+            "min_brightness": self.min_brightness,
+            "average_brightness": avg_brightness,
+            "target_brightness": target_brightness,
+            "ambient_lux": self.controller.ambient_lux,
+            "interval_ms": self.scheduler.interval,
+            "reason": self.scheduler.reason,
+        }
+
+    async def run(self) -> None:
+        """Run until ``stop`` is called or SIGINT/SIGTERM arrives, then release the controller."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        handlers = {}
+        for name, handler in (("SIGINT", self.stop), ("SIGTERM", self.stop),
+                              ("SIGHUP", lambda: self._spawn(self.reload())),
+                              ("SIGUSR1", lambda: self._spawn(self.toggle_pause()))):
+            signum = getattr(signal, name, None)  # SIGHUP and SIGUSR1 do not exist on Windows
+            if signum is None:
+                continue
+            try:
+                self._loop.add_signal_handler(signum, handler)
+            except NotImplementedError:
+                logger.info("Signal handlers are not supported by this event loop")
+                break
+            handlers[signum] = handler
+        server = None
+        if self.control_socket:
+            server = ControlServer(self.control_handlers(), self.control_socket)
+            try:
+                await server.start()
+            except Exception as e:
+                logger.error("Control socket unavailable: %s", e)
+                server = None
+
+        logger.info("Headless brightness control started")
+        try:
+            while not self._stopping:
+                if self.controller.paused and self._resume_at is not None and time.monotonic() >= self._resume_at:
+                    logger.info("Resuming automatic brightness after manual override")
+                    await self.resume()
+
+                if not self.controller.paused:
+                    self._tick = self._loop.run_in_executor(None, self.tick)
+                    try:
+                        await self._tick
+                    finally:
+                        self._tick = None
+                interval = self.scheduler.next_interval(self._reading(), paused=self.controller.paused)
+                if self._resume_at is not None:
+                    interval = min(interval, max(0, round((self._resume_at - time.monotonic()) * 1000)))
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), interval / 1000)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for signum in handlers:
+                self._loop.remove_signal_handler(signum)
+            if server is not None:
+                await server.close()
+            await self._loop.run_in_executor(None, self.controller.close)
+            logger.info("Headless brightness control stopped")
+
+    def tick(self) -> None:
+        """Run one capture-analyse-apply cycle. Called on an executor thread."""
+        with metrics.time("tick"):
+            self.last_result = self.controller.adjust_brightness(
+                self.prev_target_brightness,
+                sensitivity=self.sensitivity,
+                max_brightness=self.max_brightness,
+                min_brightness=self.min_brightness,
+            )
+        self.prev_target_brightness = self.last_result[1]
+
+    async def _idle(self):
+        # Controller state may only change between ticks; once this returns no tick
+        # runs until the caller awaits again, since ticks are started on this loop
+        while self._tick is not None:
+            await asyncio.wait([self._tick])
+
+    def _spawn(self, coroutine):
+        # Keeps a reference so the task is not garbage collected before it runs
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _reading(self):
+        # (0, 0) means the tick was skipped or failed and produced no reading
+        return None if self.last_result == (0, 0) else self.last_result[0]
+
+    def _on_manual_override(self):
+        # Called from the executor thread in the middle of a tick
+        self._loop.call_soon_threadsafe(self._handle_manual_override)
+
+    def _handle_manual_override(self):
+        logger.info("Manual brightness change detected, pausing automatic control")
+        self.prev_target_brightness = 0
+        self.last_result = (0, 0)
+        if self.override_timeout > 0:
+            self._resume_at = time.monotonic() + self.override_timeout
+        self._notify()
+
+    def _notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run Glimmer without a window.")
+    parser.add_argument("--theme", default=None, help="theme whose limits to apply (default: the saved theme)")
+    parser.add_argument("--sensitivity", type=int, default=None, choices=range(1, 11), metavar="1-10",
+                        help="default: the saved sensitivity")
+    parser.add_argument("--override-timeout", type=float, default=600.0,
+                        help="seconds to pause after a manual brightness change (0: until SIGUSR1)")
+    parser.add_argument("--capture-backend", default=None, help="see GLIMMER_CAPTURE_BACKEND")
+    parser.add_argument("--backlight", default=None, help="see GLIMMER_BACKLIGHT")
+    parser.add_argument("--ambient-sensor", default=None, help="see GLIMMER_AMBIENT_SENSOR")
+    parser.add_argument("--control-socket", default=default_socket_path(),
+                        help="path of the control socket, or 'off' (default: see GLIMMER_CONTROL_SOCKET)")
+    args = parser.parse_args(argv)
+
+    log_pipeline = setup_logging(console=True)
+    configure_from_environment(metrics)
+
+    controller = BrightnessController(None, capture_backend=args.capture_backend, backlight=args.backlight,
+                                      ambient_sensor=args.ambient_sensor)
+    daemon = HeadlessDaemon(
+        controller,
+        AdaptiveScheduler(lock_probe=SessionLockProbe(), **settings.get("scheduling")),
+        theme=args.theme or settings.get("theme"),
+        sensitivity=args.sensitivity or settings.get("sensitivity"),
+        override_timeout=args.override_timeout,
+        control_socket=None if args.control_socket in (None, "off") else args.control_socket,
+    )
+    try:
+        controller.set_metering(settings.get("metering"))
+        controller.set_metric(settings.get("metric"))
+        daemon.load_theme()
+        asyncio.run(daemon.run())
+    except ValueError as e:
+        controller.close()
+        logger.error("%s", e)
+        return 2
+    finally:
+        settings.close()
+        metrics.stop_exporter()
+        log_pipeline.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,59 @@
 import sys
 import os
 import traceback
-import logging
-from PyQt5.QtWidgets import QApplication
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, os.path.dirname(project_root))
 sys.path.insert(0, project_root)
-from src.ui import UI
 
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    filename='glimmer_app.log')
+from src.utils.logs import get_logger, log_pipeline, setup_logging
+
+logger = get_logger()
 
 def main():
+    # The headless daemon must not load PyQt5, so the UI is only imported below
+    if "--headless" in sys.argv[1:]:
+        from src.daemon import main as run_headless
+        sys.exit(run_headless([arg for arg in sys.argv[1:] if arg != "--headless"]))
+
+    # Records are written by a background thread to a size-capped, rotated file
+    setup_logging(filename='glimmer_app.log')
+
+    from PyQt5.QtWidgets import QApplication
+    from src.ui import UI
+    from src.utils.settings import settings
+
     try:
         app = QApplication(sys.argv)
         
         # Additional safety checks
         if not app:
-            logging.critical("Failed to create QApplication")
+            logger.critical("Failed to create QApplication")
             return
         
-        window = UI()
+        # Only the tray icon and automatic control start; the window is built when first shown
+        start_minimized = "--minimized" in sys.argv[1:] or settings.get("start_minimized")
+        window = UI(start_minimized=start_minimized)
         
         # Verify window creation
         if not window:
-            logging.critical("Failed to create main window")
+            logger.critical("Failed to create main window")
             return
         
-        window.show()
+        if start_minimized:
+            window.window_manager.show_tray()
+        else:
+            window.show()
         
         # Log successful initialization
-        logging.info("Application initialized successfully")
-        
+        logger.info("Application initialized successfully")
+
+        # Flush the log before Qt tears the widgets down
+        app.aboutToQuit.connect(log_pipeline.stop)
         sys.exit(app.exec_())
     
     except Exception as e:
-        logging.error(f"Unhandled exception: {e}")
-        logging.error(traceback.format_exc())
+        logger.exception("Unhandled exception: %s", e)
+        log_pipeline.stop()
         print(f"Critical error: {e}")
         traceback.print_exc()
 
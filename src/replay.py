@@ -0,0 +1,79 @@
+"""Replay a recorded luminance trace through the brightness controller.
+
+Record a trace by starting Glimmer with ``GLIMMER_TRACE_FILE`` set, then
+try other settings against it without a display or backlight:
+
+    python src/replay.py glimmer.trace
+    python src/replay.py glimmer.trace --sensitivity 5 --max-brightness 80
+
+Prints how the replayed targets compare with the recorded ones and how much
+faster than real time the replay ran.
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(project_root))
+sys.path.insert(0, project_root)
+
+from src.controllers.luminance import METERING_MODES
+from src.controllers.trace import EVENT_NAMES, NO_VALUE, read_trace, replay_trace
+
+
+def summarize(trace, replay) -> str:
+    """Describe a replay of ``trace`` as returned by ``replay_trace``."""
+    results = replay["results"]
+    events = ", ".join(
+        f"{int((trace['event'] == event).sum())} {name}" for event, name in EVENT_NAMES.items()
+    )
+    lines = [f"Trace: {len(trace)} records ({events})"]
+    if len(results) == 0:
+        lines.append("No ticks to replay")
+        return "\n".join(lines)
+
+    difference = abs(results["target"] - results["recorded_target"])
+    written = results["recorded_applied"] != NO_VALUE
+    matching = (results["applied"] == results["recorded_applied"])[written]
+    duration = float(trace["time"][-1] - trace["time"][0])
+    lines += [
+        f"Replayed {len(results)} display ticks covering {duration / 3600:.2f} h "
+        f"in {replay['wall_time']:.2f} s ({replay['speedup']:.0f}x real time)",
+        f"Target: mean {results['target'].mean():.1f}%, recorded {results['recorded_target'].mean():.1f}%",
+        f"Difference from recording: mean {difference.mean():.2f}, max {difference.max():.2f} points",
+        f"Same brightness written: {matching.mean() * 100 if len(matching) else 100:.1f}% of {len(matching)} writes",
+        f"Backlight writes: {replay['writes']}",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a Glimmer trace with other settings.")
+    parser.add_argument("trace", help="trace file recorded with GLIMMER_TRACE_FILE")
+    parser.add_argument("--sensitivity", type=int, choices=range(1, 11), metavar="1-10",
+                        help="replace the recorded sensitivity")
+    parser.add_argument("--max-brightness", type=int, help="replace the recorded maximum brightness")
+    parser.add_argument("--min-brightness", type=int, help="replace the recorded minimum brightness")
+    parser.add_argument("--metering", default="average", choices=METERING_MODES,
+                        help="metering mode; only 'average' reproduces the recorded values")
+    args = parser.parse_args(argv)
+
+    try:
+        trace = read_trace(args.trace)
+    except (OSError, ValueError) as e:
+        print(f"Error reading trace: {e}", file=sys.stderr)
+        return 2
+
+    replay = replay_trace(
+        trace,
+        sensitivity=args.sensitivity,
+        max_brightness=args.max_brightness,
+        min_brightness=args.min_brightness,
+        metering=args.metering,
+    )
+    print(summarize(trace, replay))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,27 +3,78 @@ import os
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, os.path.dirname(project_root))
 sys.path.insert(0, project_root)
-from PyQt5.QtWidgets import QHBoxLayout, QMainWindow, QWidget, QVBoxLayout, QDesktopWidget, QSystemTrayIcon, QMessageBox
-from PyQt5.QtCore import QTimer
+import concurrent.futures
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QApplication, QHBoxLayout, QMainWindow, QWidget, QVBoxLayout, QDesktopWidget, QSystemTrayIcon, QMessageBox
 from src.controllers.brightness_controller import BrightnessController
+from src.controllers.brightness_worker import BrightnessWorkerThread
+from src.controllers.scheduler import AdaptiveScheduler, SessionLockProbe
 from src.components.title import TitleSection
 from src.components.buttons import ButtonSection
 from src.components.sliders import SliderSection
 from src.components.status import StatusSection
+from src.utils.control_server import ControlServer, default_socket_path, logs_command, metrics_command
+from src.utils.logs import get_logger
+from src.utils.metrics import configure_from_environment, metrics
+from src.utils.settings import settings
 from src.utils.styles import StyleManager
 from src.utils.window_manager import WindowManager
-from utils.theme_file import load_themes, save_themes
+from src.utils.theme_file import load_themes, save_themes
 
-class UI(QMainWindow):
+logger = get_logger("ui")
+
+class GuiInvoker(QObject):
+    """Runs functions on the GUI thread on behalf of other threads."""
+
+    invoke_requested = pyqtSignal(object, object)
 
     def __init__(self):
+        super().__init__()
+        # Queued because the signal is emitted from other threads
+        self.invoke_requested.connect(self._invoke)
+
+    def call(self, function, *args) -> concurrent.futures.Future:
+        """Schedule ``function(*args)`` on the GUI thread; the future holds its result."""
+        future = concurrent.futures.Future()
+        self.invoke_requested.emit(lambda: function(*args), future)
+        return future
+
+    @pyqtSlot(object, object)
+    def _invoke(self, function, future):
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
+
+
+class UI(QMainWindow):
+    """Glimmer's main window and tray icon.
+
+    Automatic control, the settings and the control socket start with the
+    window. The sections and the stylesheet are built by ``build_widgets``,
+    at once or, with ``start_minimized``, on the first "Show" from the tray,
+    so a session that never opens the window never pays for them. The
+    parameters the sliders edit live on the window itself until then.
+    """
+
+    def __init__(self, start_minimized: bool = False):
+        """
+        Initialize the window.
+
+        Args:
+            start_minimized (bool): Start with only the tray icon and defer
+                building the widgets until the window is first shown.
+        """
         super().__init__()
         self.setWindowTitle("Glimmer")
         self.setFixedSize(500, 600)
-        self.center()
-        self.theme = "Indoor"
+        self.theme = settings.get("theme")
         self.brightness_controller = BrightnessController(self)
-        self.prev_target_brightness = 0
+        self.sensitivity = settings.get("sensitivity")
+        self.paused = False
+        self.max_brightness = self.brightness_controller.max_brightness_limit
+        self.min_brightness = self.brightness_controller.min_brightness_limit
+        self.title_section = self.button_section = self.slider_section = self.status_section = None
 
         self.THEMES = load_themes()
 
@@ -32,13 +83,19 @@ class UI(QMainWindow):
                                "System tray is not available on this system")
             sys.exit(1)
         else:
-            print("system tray access available")
+            logger.info("System tray access available")
         
         self.save_themes = save_themes
 
         self.window_manager = WindowManager(self)
 
         self.init_ui()
+        if not start_minimized:
+            self.build_widgets()
+
+    @property
+    def widgets_built(self) -> bool:
+        return self.slider_section is not None
 
     def center(self):
         qr = self.frameGeometry()
@@ -47,39 +104,139 @@ class UI(QMainWindow):
         self.move(qr.topLeft())
 
     def init_ui(self):
-        # Set up main layout
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        self.layout = QVBoxLayout(self.central_widget)
-        self.set_manual_brightness = self.brightness_controller.set_manual_brightness
-
-        # Initialize components
-        self.title_section = TitleSection(self)
-        self.button_section = ButtonSection(self)
-        self.slider_section = SliderSection(self)
-        self.status_section = StatusSection()
-        # Add components to main layout
-        try:
-            # Existing initialization code
-            if not self.title_section.layout:
-                raise ValueError("Title section layout not initialized")
-            self.layout.addLayout(self.title_section.layout or QVBoxLayout())
-            self.layout.addLayout(self.slider_section.layout or QVBoxLayout())
-            self.layout.addLayout(self.button_section.layout or QVBoxLayout())
-            self.layout.addLayout(self.status_section.layout or QVBoxLayout())
+        # Latency metrics stay off unless enabled through GLIMMER_METRICS / GLIMMER_METRICS_FILE
+        configure_from_environment(metrics)
+        QApplication.instance().aboutToQuit.connect(metrics.stop_exporter)
 
-        except Exception as e:
-            print(f"UI Initialization Error: {e}")
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
+        # Run capture and analysis on a worker thread
+        scheduler = AdaptiveScheduler(lock_probe=SessionLockProbe(), **settings.get("scheduling"))
+        self.brightness_worker = BrightnessWorkerThread(self.brightness_controller, scheduler)
+        self.set_manual_brightness = self.brightness_worker.set_manual_brightness
+        self.brightness_worker.manual_override_detected.connect(self.pause_automatic_control)
+
+        # Restore the saved settings before the worker starts
+        self.apply_settings()
+        self.settings_timer = QTimer(self)
+        self.settings_timer.timeout.connect(settings.refresh)
+        self.settings_timer.start(5000)
+        settings.add_listener(self.apply_settings)
+        QApplication.instance().aboutToQuit.connect(settings.close)
 
-        # Set up timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_brightness)
-        self.timer.start(1000)
-        # Apply styles
-        self.setStyleSheet(StyleManager.get_theme_styles())
+        QApplication.instance().aboutToQuit.connect(self.brightness_worker.shutdown)
+        self.brightness_worker.start()
+
+        # Scripts and hotkey daemons talk to Glimmer over a Unix socket served on its own thread
+        self.control_server = None
+        socket_path = default_socket_path()
+        if socket_path:
+            self.gui_invoker = GuiInvoker()
+            self.control_server = ControlServer(self.control_handlers(), socket_path)
+            try:
+                self.control_server.start_in_thread()
+                QApplication.instance().aboutToQuit.connect(self.control_server.stop)
+            except Exception as e:
+                # Scripting is optional; never let it stop the app
+                logger.error("Error starting the control socket: %s", e)
+                self.control_server = None
+
+    def build_widgets(self):
+        """Build the window's sections and apply the stylesheet. Does nothing once built."""
+        if self.widgets_built:
+            return
+        with metrics.time("ui_build"):
+            # Set up main layout
+            self.central_widget = QWidget()
+            self.setCentralWidget(self.central_widget)
+            self.layout = QVBoxLayout(self.central_widget)
+
+            # Initialize components
+            self.title_section = TitleSection(self)
+            self.button_section = ButtonSection(self)
+            self.slider_section = SliderSection(self)
+            self.status_section = StatusSection()
+            # Add components to main layout
+            try:
+                # Existing initialization code
+                if not self.title_section.layout:
+                    raise ValueError("Title section layout not initialized")
+                self.layout.addLayout(self.title_section.layout or QVBoxLayout())
+                self.layout.addLayout(self.slider_section.layout or QVBoxLayout())
+                self.layout.addLayout(self.button_section.layout or QVBoxLayout())
+                self.layout.addLayout(self.status_section.layout or QVBoxLayout())
+
+            except Exception as e:
+                logger.exception("UI Initialization Error: %s", e)
+                sys.exit(1)
+
+            # Show the state reached so far, then follow it
+            self.slider_section.sensitivity_slider.setValue(self.sensitivity)
+            self.slider_section.max_brightness_slider.setValue(self.max_brightness)
+            self.slider_section.min_brightness_slider.setValue(self.min_brightness)
+            self.status_section.update_status(*self.brightness_worker.worker.last_result)
+            if self.paused:
+                self.button_section.pause_button.setText("Resume")
+                self.slider_section.show_manual_controls()
+                if self.brightness_controller.current_manual_brightness is not None:
+                    self.slider_section.manual_brightness_slider.setValue(self.brightness_controller.current_manual_brightness)
+            self.brightness_worker.brightness_updated.connect(self.status_section.update_status)
+            self.brightness_worker.manual_brightness_failed.connect(self.status_section.show_error)
+            self.slider_section.sensitivity_slider.valueChanged.connect(self.set_sensitivity)
+            self.slider_section.max_brightness_slider.valueChanged.connect(self._slider_limits_changed)
+            self.slider_section.min_brightness_slider.valueChanged.connect(self._slider_limits_changed)
+
+            # Apply styles
+            self.setStyleSheet(StyleManager.get_theme_styles())
+            self.center()
+
+    def apply_settings(self):
+        """Apply the settings store to the widgets and the controller, at startup and when the file changes."""
+        self.THEMES = load_themes()
+        self.set_sensitivity(settings.get("sensitivity"))
+        self.brightness_worker.set_metering(settings.get("metering"))
+        self.brightness_worker.set_metric(settings.get("metric"))
+        self.set_theme(settings.get("theme"))
+
+    def status(self) -> dict:
+        """State reported on the control socket. Safe to call from any thread."""
+        # The worker receives parameter changes through queued signals; report them as set
+        return {**self.brightness_worker.status(), "paused": self.paused, "theme": self.theme,
+                "sensitivity": self.sensitivity,
+                "max_brightness": self.max_brightness, "min_brightness": self.min_brightness}
+
+    def control_handlers(self) -> dict:
+        """Commands served on the control socket. Widget changes run on the GUI thread."""
+        def on_gui(action):
+            def run(**arguments):
+                action(**arguments)
+                return self.status()
+            return lambda **arguments: self.gui_invoker.call(lambda: run(**arguments))
+
+        return {
+            "status": self.status,
+            "metrics": metrics_command,
+            "logs": logs_command,
+            "pause": on_gui(self.pause_automatic_control),
+            "resume": on_gui(self.resume_automatic_control),
+            "set_brightness": on_gui(self.set_brightness_by_hand),
+            "set_theme": on_gui(self.switch_theme),
+        }
+
+    def set_brightness_by_hand(self, value):
+        """Pause automatic control and move the manual slider, which writes the brightness."""
+        if not isinstance(value, int) or not 0 <= value <= 100:
+            raise ValueError("Brightness must be an integer between 0 and 100")
+        if not self.paused:
+            self.pause_automatic_control()
+        slider = self.slider_section.manual_brightness_slider if self.widgets_built else None
+        if slider is None or slider.value() == value:
+            self.set_manual_brightness(value)
+        else:
+            slider.setValue(value)
+
+    def switch_theme(self, theme):
+        if theme not in self.THEMES:
+            raise ValueError(f"Unknown theme '{theme}'. Expected one of {sorted(self.THEMES)}")
+        self.set_theme(theme)
 
     def closeEvent(self, event):
         event.ignore()
@@ -88,39 +245,49 @@ class UI(QMainWindow):
     def set_theme(self, theme):
         self.theme = theme
         max_brightness, min_brightness = self.THEMES[theme]
-        if(theme == 'Indoor'):
-            self.slider_section.min_brightness_slider.setValue(min_brightness)
-            self.slider_section.max_brightness_slider.setValue(max_brightness)
-        else:
-            self.slider_section.max_brightness_slider.setValue(max_brightness)
-            self.slider_section.min_brightness_slider.setValue(min_brightness)
-        self.brightness_controller.set_brightness_limits(max_brightness, min_brightness)
-
-    def update_brightness(self):
-        avg_brightness, target_brightness = self.brightness_controller.adjust_brightness(
-            self.prev_target_brightness,
-            sensitivity=self.slider_section.sensitivity_slider.value(),
-            max_brightness=self.slider_section.max_brightness_slider.value(),
-            min_brightness=self.slider_section.min_brightness_slider.value(),
-        )
-        self.prev_target_brightness = target_brightness
-        self.status_section.status_label.setText(
-            f"Average Brightness: {avg_brightness:.2f}\n"
-            f"Adjusted Brightness: {target_brightness:.2f}%"
-        )
+        if self.widgets_built:
+            if(theme == 'Indoor'):
+                self.slider_section.min_brightness_slider.setValue(min_brightness)
+                self.slider_section.max_brightness_slider.setValue(max_brightness)
+            else:
+                self.slider_section.max_brightness_slider.setValue(max_brightness)
+                self.slider_section.min_brightness_slider.setValue(min_brightness)
+        self.max_brightness, self.min_brightness = max_brightness, min_brightness
+        self.update_worker_parameters()
+        settings.set("theme", theme)
+
+    def set_sensitivity(self, sensitivity):
+        self.sensitivity = sensitivity
+        if self.widgets_built:
+            self.slider_section.sensitivity_slider.setValue(sensitivity)
+        self.update_worker_parameters()
+        settings.set("sensitivity", sensitivity)
+
+    def _slider_limits_changed(self, *_):
+        self.max_brightness = self.slider_section.max_brightness_slider.value()
+        self.min_brightness = self.slider_section.min_brightness_slider.value()
+        self.update_worker_parameters()
+
+    def update_worker_parameters(self, *_):
+        self.brightness_worker.set_parameters(self.sensitivity, self.max_brightness, self.min_brightness)
 
     def toggle_pause(self):
-        if self.brightness_controller.paused:
+        if self.paused:
             self.resume_automatic_control()
         else:
             self.pause_automatic_control()
 
     def resume_automatic_control(self):
-        self.brightness_controller.resume()
-        self.button_section.pause_button.setText("Pause")
-        self.slider_section.show_automatic_controls()
+        # The worker changes the controller; the flag answers the UI before it gets there
+        self.paused = False
+        self.brightness_worker.resume()
+        if self.widgets_built:
+            self.button_section.pause_button.setText("Pause")
+            self.slider_section.show_automatic_controls()
 
     def pause_automatic_control(self):
-        self.brightness_controller.pause()
-        self.button_section.pause_button.setText("Resume")
-        self.slider_section.show_manual_controls()
\ No newline at end of file
+        self.paused = True
+        self.brightness_worker.pause()
+        if self.widgets_built:
+            self.button_section.pause_button.setText("Resume")
+            self.slider_section.show_manual_controls()
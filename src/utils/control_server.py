@@ -0,0 +1,259 @@
+import asyncio
+import concurrent.futures
+import inspect
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .lazy_import import import_times
+from .logs import get_logger, log_pipeline
+from .metrics import metrics
+
+logger = get_logger("control")
+
+# Longest request line accepted, batches included
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def default_socket_path() -> Optional[str]:
+    """
+    Where the control socket is created.
+
+    Returns:
+        str: ``$GLIMMER_CONTROL_SOCKET`` if set, else ``glimmer.sock`` in
+        ``$XDG_RUNTIME_DIR``, else a per-user file in the temp directory.
+        None when ``GLIMMER_CONTROL_SOCKET`` is "off", "0" or empty, and on
+        platforms without Unix domain sockets or user ids, such as Windows.
+    """
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid"):
+        return None
+    configured = os.environ.get("GLIMMER_CONTROL_SOCKET")
+    if configured is not None:
+        return None if configured.lower() in ("", "0", "off", "false", "no") else configured
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "glimmer.sock")
+    return os.path.join(tempfile.gettempdir(), f"glimmer-{os.getuid()}.sock")
+
+
+class ControlServer:
+    """Serves line-delimited JSON commands on a Unix domain socket.
+
+    Each request line is an object such as ``{"command": "status"}``, with
+    the command's arguments as further keys and an optional ``id`` that is
+    echoed back, or an array of such objects, executed in order and answered
+    with one array. Every reply is one line: ``{"ok": true, "result": ...}``
+    or ``{"ok": false, "error": "..."}``.
+
+    Handlers run on the server's event loop and must return quickly. One
+    that has to run elsewhere (e.g. on the Qt GUI thread) returns a
+    ``concurrent.futures.Future`` or an awaitable, which is awaited without
+    blocking other clients. The server runs either on an existing asyncio
+    loop (``start``/``close``) or on its own thread (``start_in_thread``/
+    ``stop``), so it never shares a thread with the capture loop.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[..., Any]], path: Optional[str] = None):
+        """
+        Initialize the server.
+
+        Args:
+            handlers (dict): Command name to a function taking the command's
+                arguments as keywords and returning a JSON-serialisable result.
+            path (str, optional): Socket path; defaults to ``default_socket_path()``.
+        """
+        self.handlers = dict(handlers)
+        self.path = path or default_socket_path()
+        self.requests = 0
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    async def start(self) -> None:
+        """
+        Listen on the socket from the running event loop.
+
+        Raises:
+            OSError: If another process is already serving the socket.
+        """
+        self._remove_stale_socket()
+        self._loop = asyncio.get_running_loop()
+        previous = os.umask(0o177)  # Owner only, from the moment the socket exists
+        try:
+            self._server = await asyncio.start_unix_server(self._serve, self.path, limit=MAX_REQUEST_BYTES)
+        finally:
+            os.umask(previous)
+        logger.info("Control socket listening on %s", self.path)
+
+    async def close(self) -> None:
+        """Stop listening and remove the socket."""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def start_in_thread(self, timeout: float = 5.0) -> None:
+        """
+        Run the server on a new event loop in a daemon thread.
+
+        Raises:
+            OSError: If the socket could not be created.
+        """
+        started = concurrent.futures.Future()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                started.set_exception(e)
+                loop.close()
+                return
+            started.set_result(None)
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.close())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="glimmer-control", daemon=True)
+        self._thread.start()
+        started.result(timeout)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop a server started with ``start_in_thread``."""
+        if self._thread is None:
+            return
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _remove_stale_socket(self):
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(f"{self.path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.path)  # Left behind by a process that did not exit cleanly
+            return
+        finally:
+            probe.close()
+        raise OSError(f"Another Glimmer is serving {self.path}")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(self._encode({"ok": False, "error": "request too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self._encode(await self._handle_line(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_line(self, line: bytes):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+        if isinstance(request, list):
+            return [await self.execute(item) for item in request]
+        return await self.execute(request)
+
+    async def execute(self, request) -> Dict[str, Any]:
+        """Run one request object and return its reply."""
+        self.requests += 1
+        if not isinstance(request, dict) or not isinstance(request.get("command"), str):
+            return {"ok": False, "error": "a request is an object with a 'command' string"}
+        arguments = {key: value for key, value in request.items() if key not in ("command", "id")}
+        reply = {"id": request["id"]} if "id" in request else {}
+
+        handler = self.handlers.get(request["command"])
+        if handler is None:
+            reply.update(ok=False, error=f"unknown command '{request['command']}', expected one of {sorted(self.handlers)}")
+            return reply
+        try:
+            result = handler(**arguments)
+            if isinstance(result, concurrent.futures.Future):
+                result = await asyncio.wrap_future(result)
+            elif inspect.isawaitable(result):
+                result = await result
+        except (TypeError, ValueError, KeyError) as e:
+            reply.update(ok=False, error=str(e))
+            return reply
+        except Exception as e:
+            logger.error("Error running control command %s: %s", request['command'], e)
+            reply.update(ok=False, error=str(e))
+            return reply
+        reply.update(ok=True, result=result)
+        return reply
+
+    @staticmethod
+    def _encode(reply) -> bytes:
+        return json.dumps(reply, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+def metrics_command(format: str = "summary"):
+    """
+    Handler of the ``metrics`` command: per-stage latencies and how long each
+    lazily imported module took to load, or Prometheus text for ``format="prometheus"``.
+    """
+    if format == "prometheus":
+        return metrics.to_prometheus()
+    if format != "summary":
+        raise ValueError(f"Unknown metrics format '{format}'. Expected 'summary' or 'prometheus'")
+    imports = {name: round(seconds * 1000, 1) for name, seconds in import_times().items()}
+    return {"enabled": metrics.enabled, "stages": metrics.summary(), "import_ms": imports}
+
+
+def logs_command(limit: int = 100):
+    """Handler of the ``logs`` command: the newest ``limit`` records from the in-memory ring."""
+    if not isinstance(limit, int):
+        raise ValueError("limit must be an integer")
+    return log_pipeline.dump(limit)
+
+
+def send_commands(requests: List[Dict[str, Any]], path: Optional[str] = None, timeout: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    Send requests to a running Glimmer as one batch and return the replies.
+
+    Args:
+        requests (list): Request objects, e.g. ``[{"command": "pause"}]``.
+        path (str, optional): Socket path; defaults to ``default_socket_path()``.
+        timeout (float): Seconds to wait for the connection and the reply.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path or default_socket_path())
+        connection.sendall(json.dumps(requests).encode() + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply)
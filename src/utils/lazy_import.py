@@ -0,0 +1,64 @@
+import importlib
+import sys
+import threading
+import time
+import types
+from typing import Dict
+
+from .logs import get_logger
+
+logger = get_logger("imports")
+
+_import_times = {}
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder for a module that is imported on first attribute access.
+
+    Once loaded, the real module's attributes are copied onto the placeholder,
+    so later lookups are plain attribute reads with no extra indirection.
+    Anything else (e.g. submodules the module itself loads lazily, such as
+    ``numpy.random``) is looked up on the real module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attribute):
+        return getattr(self._lazy_load(), attribute)
+
+    def __repr__(self):
+        state = "not loaded" if self.__dict__["_lazy_module"] is None else "loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+    def _lazy_load(self):
+        with _lock:
+            if self.__dict__["_lazy_module"] is not None:
+                return self.__dict__["_lazy_module"]
+            started = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            elapsed = time.perf_counter() - started
+            _import_times.setdefault(self.__name__, elapsed)
+            logger.debug("Imported %s in %.1f ms", self.__name__, elapsed * 1000)
+            self.__dict__.update(module.__dict__)
+            self.__dict__["_lazy_module"] = module
+            return module
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return ``name`` if it is already imported, otherwise a ``LazyModule`` for it.
+
+    Use for heavy dependencies (cv2, numpy, screen_brightness_control) that
+    are only needed once the brightness loop runs, so they do not slow down
+    startup. Import errors surface on first use instead of at import time.
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def import_times() -> Dict[str, float]:
+    """Seconds each lazily imported module took to import, including its own imports."""
+    with _lock:
+        return dict(_import_times)
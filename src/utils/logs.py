@@ -0,0 +1,226 @@
+import atexit
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Subsystems whose level can be set through GLIMMER_LOG_LEVELS, e.g. "ui=DEBUG,capture=WARNING"
+SUBSYSTEMS = ("capture", "controller", "backlight", "ui", "control", "metrics", "imports", "settings", "ambient")
+
+
+def get_logger(subsystem: Optional[str] = None) -> logging.Logger:
+    """Logger of a subsystem from ``SUBSYSTEMS``, or Glimmer's top-level logger."""
+    return logging.getLogger(f"glimmer.{subsystem}" if subsystem else "glimmer")
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``burst`` records per message template every ``interval`` seconds.
+
+    Records are grouped by logger, level and unformatted message, so a
+    per-tick ``logger.error("Error capturing %s: %s", name, e)`` is logged a
+    few times and then summarised with the number of records it swallowed.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 5, max_keys: int = 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._windows = {}  # key -> [window start, records let through, records suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows.clear()  # Messages built without a template; forget them all
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    # A full queue drops the record rather than blocking the thread that logs
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RecordRing(logging.Handler):
+    """Keeps the most recent records in memory, for dumping on demand."""
+
+    def __init__(self, capacity: int = 2000):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def dump(self, limit: Optional[int] = None) -> List[str]:
+        """The newest ``limit`` records (all by default), oldest first, formatted."""
+        records = list(self.records)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return [self.format(record) for record in records]
+
+
+class LogPipeline:
+    """Glimmer's logging: threads only enqueue records, a background listener does all I/O.
+
+    The root logger gets a single queue handler. A ``QueueListener`` thread
+    writes the records to a size-capped rotating file and/or stderr and into
+    a ``RecordRing``, so neither the capture loop nor UI events wait on disk.
+    A ``RateLimitFilter`` in front of the queue keeps repeated per-tick
+    messages from flooding it, and a full queue drops records.
+    """
+
+    def __init__(self):
+        self.ring = RecordRing()
+        self.rate_limit = RateLimitFilter()
+        self._queue_handler = None
+        self._listener = None
+        self._handlers = []
+
+    @property
+    def dropped(self) -> int:
+        """Records lost because the queue was full."""
+        return self._queue_handler.dropped if self._queue_handler is not None else 0
+
+    def start(self, filename: Optional[str] = None, console: bool = False, level: int = logging.INFO,
+              levels: Optional[Dict[str, int]] = None, max_bytes: int = 1024 * 1024, backups: int = 3,
+              ring_size: int = 2000, queue_size: int = 10000) -> None:
+        """
+        Install the pipeline on the root logger, replacing any previous setup.
+
+        Args:
+            filename (str, optional): Log file, rotated at ``max_bytes`` with
+                ``backups`` old files kept.
+            console (bool): Also write to stderr.
+            level (int): Level of every logger without its own.
+            levels (dict, optional): Subsystem name (see ``SUBSYSTEMS``) to level.
+            max_bytes (int): Size at which the log file is rotated.
+            backups (int): Rotated files to keep.
+            ring_size (int): Records kept in memory.
+            queue_size (int): Records waiting for the writer before new ones are dropped.
+        """
+        self.stop()
+        # Not in LOG_FORMAT, and looking them up is most of the cost of creating a record
+        logging.logProcesses = logging.logMultiprocessing = logging.logThreads = False
+        formatter = logging.Formatter(LOG_FORMAT)
+        self.ring = RecordRing(ring_size)
+        self._handlers = [self.ring]
+        if filename:
+            directory = os.path.dirname(os.path.abspath(filename))
+            os.makedirs(directory, exist_ok=True)
+            self._handlers.append(logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True,
+            ))
+        if console:
+            self._handlers.append(logging.StreamHandler(sys.stderr))
+        for handler in self._handlers:
+            handler.setFormatter(formatter)
+
+        self._queue_handler = _DroppingQueueHandler(queue.Queue(queue_size))
+        self._queue_handler.addFilter(self.rate_limit)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self._queue_handler)
+        root.setLevel(level)
+        for subsystem, subsystem_level in (levels or {}).items():
+            get_logger(subsystem).setLevel(subsystem_level)
+
+        self._listener = logging.handlers.QueueListener(self._queue_handler.queue, *self._handlers)
+        self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Write out queued records and close the handlers."""
+        if self._listener is None:
+            return
+        logging.getLogger().removeHandler(self._queue_handler)
+        self._listener.stop()
+        self._listener = None
+        for handler in self._handlers:
+            if handler is not self.ring:
+                handler.close()
+        atexit.unregister(self.stop)
+
+    def dump(self, limit: Optional[int] = None) -> List[str]:
+        """Recent records from the ring, oldest first."""
+        return self.ring.dump(limit)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    Parse ``"ui=DEBUG,capture=WARNING"`` into subsystem levels.
+
+    Raises:
+        ValueError: For an unknown subsystem or level.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        subsystem, _, name = item.partition("=")
+        subsystem = subsystem.strip()
+        if subsystem not in SUBSYSTEMS:
+            raise ValueError(f"Unknown log subsystem '{subsystem}'. Expected one of {SUBSYSTEMS}")
+        levels[subsystem] = _level(name)
+    return levels
+
+
+def _level(name: str) -> int:
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level '{name}'")
+    return level
+
+
+def setup_logging(filename: Optional[str] = None, console: bool = False,
+                  environ: Optional[dict] = None) -> LogPipeline:
+    """
+    Start ``log_pipeline`` with levels from the environment.
+
+    ``GLIMMER_LOG_LEVEL`` (default INFO) sets the level of everything and
+    ``GLIMMER_LOG_LEVELS`` overrides it per subsystem, e.g. ``ui=DEBUG``.
+    ``GLIMMER_LOG_FILE`` replaces ``filename``; an invalid setting is
+    reported and ignored.
+    """
+    environ = os.environ if environ is None else environ
+    level, levels = logging.INFO, {}
+    try:
+        level = _level(environ.get("GLIMMER_LOG_LEVEL", "INFO"))
+        levels = parse_levels(environ.get("GLIMMER_LOG_LEVELS", ""))
+    except ValueError as e:
+        print(f"Error reading the log settings: {e}", file=sys.stderr)
+    log_pipeline.start(environ.get("GLIMMER_LOG_FILE", filename), console=console, level=level, levels=levels)
+    return log_pipeline
+
+
+log_pipeline = LogPipeline()
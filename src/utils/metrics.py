@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .logs import get_logger
+
+logger = get_logger("metrics")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _NullTimer:
+    """Stand-in returned by ``Metrics.time`` while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def _nearest_rank(ordered, q: float) -> float:
+    """Quantile ``q`` of an already sorted list by the nearest-rank method."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyWindow:
+    """The most recent latencies of one stage, plus running totals."""
+
+    def __init__(self, size: int = 1024):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+
+class Metrics:
+    """Per-stage latency collection for the brightness loop.
+
+    Code under measurement wraps each stage in ``with metrics.time(stage):``.
+    While disabled that returns a shared no-op context manager, so the cost
+    is one attribute check per stage. While enabled, the last ``window``
+    latencies of each stage are kept for quantiles, and ``start_exporter``
+    writes them periodically to a file in the Prometheus text format (for
+    node_exporter's textfile collector, or just to ``cat``).
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1024):
+        """
+        Initialize the collector.
+
+        Args:
+            enabled (bool): Whether latencies are recorded.
+            window (int): Number of recent latencies kept per stage.
+        """
+        self.enabled = enabled
+        self.window = window
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._exporter_stop = threading.Event()
+
+    def time(self, stage: str):
+        """Context manager that records how long its body takes as ``stage``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record one latency in seconds."""
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self._windows.get(stage)
+            if window is None:
+                window = self._windows[stage] = LatencyWindow(self.window)
+            window.add(seconds)
+
+    def reset(self) -> None:
+        """Drop every recorded latency."""
+        with self._lock:
+            self._windows.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the latency distribution of every stage seen so far.
+
+        Returns:
+            dict: ``{stage: {"count", "p50", "p95", "p99", "max"}}`` with
+            latencies in milliseconds, computed over the recent window.
+        """
+        with self._lock:
+            windows = {stage: (sorted(window.samples), window.count) for stage, window in self._windows.items()}
+
+        return {
+            stage: {
+                "count": count,
+                "p50": _nearest_rank(ordered, 0.5) * 1000,
+                "p95": _nearest_rank(ordered, 0.95) * 1000,
+                "p99": _nearest_rank(ordered, 0.99) * 1000,
+                "max": (ordered[-1] if ordered else 0.0) * 1000,
+            }
+            for stage, (ordered, count) in windows.items()
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the collected latencies as a Prometheus summary metric."""
+        with self._lock:
+            windows = {
+                stage: (sorted(window.samples), window.count, window.total)
+                for stage, window in self._windows.items()
+            }
+
+        lines = [
+            "# HELP glimmer_stage_latency_seconds Latency of each stage of the brightness loop.",
+            "# TYPE glimmer_stage_latency_seconds summary",
+        ]
+        for stage in sorted(windows):
+            ordered, count, total = windows[stage]
+            for q in QUANTILES:
+                value = _nearest_rank(ordered, q)
+                lines.append(f'glimmer_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'glimmer_stage_latency_seconds_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'glimmer_stage_latency_seconds_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write ``to_prometheus`` to ``path`` atomically, so readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary, path)
+
+    def start_exporter(self, path: str, interval: float = 15.0) -> None:
+        """
+        Enable collection and write the metrics file every ``interval`` seconds.
+
+        Args:
+            path (str): Destination of the Prometheus text file.
+            interval (float): Seconds between writes.
+        """
+        self.stop_exporter()
+        self.enabled = True
+        self._exporter_stop.clear()
+
+        def export():
+            while not self._exporter_stop.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    logger.error("Error writing metrics to %s: %s", path, e)
+            try:
+                self.write_prometheus(path)  # Final snapshot on shutdown
+            except OSError:
+                pass
+
+        self._exporter = threading.Thread(target=export, name="glimmer-metrics", daemon=True)
+        self._exporter.start()
+
+    def stop_exporter(self) -> None:
+        """Stop the periodic writes, writing one last snapshot."""
+        if self._exporter is not None:
+            self._exporter_stop.set()
+            self._exporter.join()
+            self._exporter = None
+
+
+def configure_from_environment(metrics: "Metrics", environ: Optional[dict] = None) -> None:
+    """
+    Enable ``metrics`` from environment variables.
+
+    ``GLIMMER_METRICS=1`` turns collection on. ``GLIMMER_METRICS_FILE`` also
+    turns it on and writes the Prometheus file there every
+    ``GLIMMER_METRICS_INTERVAL`` seconds (default 15).
+    """
+    environ = os.environ if environ is None else environ
+    path = environ.get("GLIMMER_METRICS_FILE")
+    if path:
+        metrics.start_exporter(path, float(environ.get("GLIMMER_METRICS_INTERVAL", 15)))
+    elif environ.get("GLIMMER_METRICS", "").lower() in ("1", "true", "yes"):
+        metrics.enabled = True
+
+
+# Shared by every part of the brightness loop. Stages recorded: capture, reduction,
+# target, backlight_get, backlight_set, ui_update and tick (the whole cycle).
+metrics = Metrics()
@@ -0,0 +1,251 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from ..controllers.luminance import METERING_MODES, is_metric
+from .logs import get_logger
+
+logger = get_logger("settings")
+
+SETTINGS_VERSION = 1
+
+# Shipped theme defaults, also the file older versions of Glimmer saved themes to
+LEGACY_THEMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes.json")
+
+DEFAULT_SETTINGS = {
+    "version": SETTINGS_VERSION,
+    "themes": {"Outdoor": [100, 50], "Indoor": [50, 10]},  # [max, min] brightness in percent
+    "theme": "Indoor",
+    "sensitivity": 7,
+    "start_minimized": False,  # Start with only the tray icon, see ``UI``
+    "metering": "average",
+    "metric": "mean",
+    "scheduling": {"min_interval_ms": 250, "initial_interval_ms": 1000, "max_interval_ms": 5000,
+                   "idle_interval_ms": 15000},  # AdaptiveScheduler arguments
+}
+
+
+def settings_path() -> str:
+    """``$GLIMMER_SETTINGS_FILE``, else ``glimmer/settings.json`` in ``$XDG_CONFIG_HOME`` or ``~/.config``."""
+    configured = os.environ.get("GLIMMER_SETTINGS_FILE")
+    if configured:
+        return configured
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config_home, "glimmer", "settings.json")
+
+
+def _signature(path):
+    # Changes whenever the file is rewritten, including by os.replace
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _validate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge ``data`` over the defaults, dropping values of the wrong shape."""
+    settings = copy.deepcopy(DEFAULT_SETTINGS)
+    themes = data.get("themes")
+    if isinstance(themes, dict):
+        valid = {
+            str(name): [int(limits[0]), int(limits[1])]
+            for name, limits in themes.items()
+            if isinstance(limits, (list, tuple)) and len(limits) == 2 and all(map(_is_number, limits))
+            and 0 <= limits[1] <= limits[0] <= 100
+        }
+        # Merged over the defaults: the UI has a button for each built-in theme
+        settings["themes"].update(valid)
+    if data.get("theme") in settings["themes"]:
+        settings["theme"] = data["theme"]
+    elif settings["theme"] not in settings["themes"]:
+        settings["theme"] = next(iter(settings["themes"]))
+    if isinstance(data.get("sensitivity"), int) and 1 <= data["sensitivity"] <= 10:
+        settings["sensitivity"] = data["sensitivity"]
+    if isinstance(data.get("start_minimized"), bool):
+        settings["start_minimized"] = data["start_minimized"]
+    if data.get("metering") in METERING_MODES:
+        settings["metering"] = data["metering"]
+    if isinstance(data.get("metric"), str) and is_metric(data["metric"]):
+        settings["metric"] = data["metric"]
+    scheduling = data.get("scheduling")
+    if isinstance(scheduling, dict):
+        merged = {**settings["scheduling"], **{
+            key: int(value) for key, value in scheduling.items()
+            if key in settings["scheduling"] and _is_number(value) and value > 0
+        }}
+        if merged["min_interval_ms"] <= merged["initial_interval_ms"] <= merged["max_interval_ms"]:
+            settings["scheduling"] = merged
+    return settings
+
+
+def _migrate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Bring settings of an older schema version up to ``SETTINGS_VERSION``."""
+    version = data.get("version")
+    if version is None:
+        # A bare themes file, as written by save_themes before the settings store existed
+        data = {"themes": data}
+    elif version > SETTINGS_VERSION:
+        logger.warning("Settings version %s is newer than this Glimmer (%s); unknown keys are ignored",
+                       version, SETTINGS_VERSION)
+    return _validate(data)
+
+
+class SettingsStore:
+    """Glimmer's persistent settings, kept in memory and saved as JSON.
+
+    Reads come from the cache. ``set`` updates it and schedules a save
+    ``debounce`` seconds later, so a slider dragged across its range costs a
+    single write. Saves go to a temporary file in the same directory that
+    is then renamed over the settings file, so the file is never seen half
+    written. ``refresh`` reloads only when the file's modification time,
+    size or inode changed since it was last read or written.
+    """
+
+    def __init__(self, path: Optional[str] = None, debounce: float = 1.0):
+        """
+        Initialize the store. Nothing is read until the first access.
+
+        Args:
+            path (str, optional): Settings file; defaults to ``settings_path()``.
+            debounce (float): Seconds to wait after the last change before saving.
+        """
+        self.path = path or settings_path()
+        self.debounce = debounce
+        self.saves = 0
+        self._data = None
+        self._signature = None
+        self._dirty = False
+        self._timer = None
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Any:
+        """Return a copy of a setting, so changing it does not change the store."""
+        with self._lock:
+            return copy.deepcopy(self._load()[key])
+
+    def set(self, key: str, value: Any) -> None:
+        """Change a setting and schedule a save."""
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """
+        Change several settings at once and schedule a save.
+
+        Raises:
+            KeyError: For a key that is not in the schema.
+            ValueError: For a value the schema rejects.
+        """
+        with self._lock:
+            current = self._load()
+            unknown = set(values) - set(DEFAULT_SETTINGS) - {"version"}
+            if unknown:
+                raise KeyError(f"Unknown settings: {sorted(unknown)}")
+            candidate = {**current, **json.loads(json.dumps(values))}  # Tuples become lists, as when read back
+            validated = _validate(candidate)
+            rejected = [key for key in values if validated[key] != candidate[key]]
+            if rejected:
+                raise ValueError(f"Invalid values for settings: {sorted(rejected)}")
+            if validated == current:
+                return
+            self._data = validated
+            self._dirty = True
+            self._schedule_save()
+
+    @property
+    def themes(self) -> Dict[str, tuple]:
+        """Theme name to ``(max_brightness, min_brightness)``."""
+        return {name: tuple(limits) for name, limits in self.get("themes").items()}
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener()`` after ``refresh`` loads changes made outside this store."""
+        self._listeners.append(listener)
+
+    def refresh(self) -> bool:
+        """
+        Reload the file if it changed on disk since it was last read or written.
+
+        Returns:
+            bool: True if settings were reloaded. Unsaved changes win over the file.
+        """
+        with self._lock:
+            if self._data is not None and (self._dirty or _signature(self.path) == self._signature):
+                return False
+            self._data = None
+            self._load()
+        for listener in list(self._listeners):
+            listener()
+        return True
+
+    def flush(self) -> None:
+        """Save pending changes now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            data = json.dumps(self._data, indent=4)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                os.makedirs(directory, exist_ok=True)
+                descriptor, temporary = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+                try:
+                    with os.fdopen(descriptor, "w") as file:
+                        file.write(data)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    os.replace(temporary, self.path)
+                except BaseException:
+                    os.unlink(temporary)
+                    raise
+            except OSError as e:
+                logger.error("Error saving settings to %s: %s", self.path, e)
+                return
+            self._dirty = False
+            self._signature = _signature(self.path)
+            self.saves += 1
+
+    def close(self) -> None:
+        """Save pending changes and stop the save timer."""
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+        signature = _signature(self.path)
+        data = None
+        for path in (self.path, LEGACY_THEMES_PATH):
+            try:
+                with open(path) as file:
+                    data = _migrate(json.load(file))
+                break
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, TypeError, IndexError) as e:
+                logger.error("Error reading settings from %s: %s", path, e)
+        self._data = data if data is not None else copy.deepcopy(DEFAULT_SETTINGS)
+        self._signature = signature
+        return self._data
+
+    def _schedule_save(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        else:
+            atexit.register(self.flush)  # Changes made just before exit are still saved
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+settings = SettingsStore()
@@ -1,28 +1,16 @@
-import json
-import os
+from .settings import settings
 
-THEMES_FILE_PATH = "./utils/themes.json"
 
 def load_themes():
     """
-    Load theme settings from a JSON file.
-    If the file does not exist, return the default settings.
+    Load theme settings from the settings store.
+    Returns theme name to (max_brightness, min_brightness).
     """
-    if os.path.exists(THEMES_FILE_PATH):
-        with open(THEMES_FILE_PATH, 'r') as file:
-            themes = json.load(file)
-            return themes
-    else:
-        # Default themes if the file doesn't exist
-        return {
-            "Outdoor": (100, 50),
-            "Indoor": (50, 10)
-        }
+    return settings.themes
+
 
 def save_themes(themes):
     """
-    Save theme settings to a JSON file.
+    Save theme settings through the settings store; the file is written shortly after.
     """
-    os.makedirs(os.path.dirname(THEMES_FILE_PATH), exist_ok=True)
-    with open(THEMES_FILE_PATH, 'w') as file:
-        json.dump(themes, file, indent=4)
+    settings.set("themes", {name: list(limits) for name, limits in themes.items()})
@@ -28,6 +28,10 @@ class WindowManager:
         self.tray_icon.setContextMenu(tray_menu)
         self.tray_icon.activated.connect(self.tray_icon_activated)
 
+    def show_tray(self):
+        """Show the tray icon without a notification, for starting minimized."""
+        self.tray_icon.show()
+
     def minimize(self):
         self.main_window.hide()
         self.tray_icon.show()
@@ -43,6 +47,9 @@ class WindowManager:
         self.restore_timer.start(100)
 
     def _delayed_restore(self):
+        # The widgets of a window started minimized are built on its first show
+        self.main_window.build_widgets()
+
         # Ensure window is visible and has correct flags
         self.main_window.setWindowState(self.main_window.windowState() & ~Qt.WindowMinimized)
         self.main_window.show()
@@ -0,0 +1,102 @@
+import pytest
+
+from src.controllers.ambient import AmbientGate, AmbientLightSensor, ambient_level, create_ambient_sensor
+from src.controllers.brightness_controller import BrightnessController
+
+
+def _device(root, name, files):
+    device = root / name
+    device.mkdir(parents=True)
+    for filename, content in files.items():
+        (device / filename).write_text(f"{content}\n")
+    return device
+
+
+@pytest.fixture
+def iio(tmp_path, monkeypatch):
+    """A fake /sys/bus/iio/devices with an accelerometer and a raw light sensor."""
+    root = tmp_path / "iio"
+    _device(root, "iio:device0", {"name": "accel", "in_accel_x_raw": 12})
+    _device(root, "iio:device1", {"name": "acpi-als", "in_illuminance_raw": 400,
+                                  "in_illuminance_scale": 0.5, "in_illuminance_offset": 10})
+    monkeypatch.setenv("GLIMMER_AMBIENT_SENSOR_ROOT", str(root))
+    return root
+
+
+def test_raw_reading_is_offset_and_scaled(iio):
+    sensor = AmbientLightSensor(str(iio))
+    try:
+        assert sensor.device == "iio:device1"
+        assert sensor.read() == (400 + 10) * 0.5
+        (iio / "iio:device1" / "in_illuminance_raw").write_text("1000\n")
+        assert sensor.read() == (1000 + 10) * 0.5  # The open file is read again, not cached
+    finally:
+        sensor.close()
+
+
+def test_processed_input_is_preferred(tmp_path):
+    _device(tmp_path, "iio:device0", {"in_illuminance_input": 321.5, "in_illuminance_raw": 1})
+    sensor = AmbientLightSensor(str(tmp_path))
+    assert sensor.read() == 321.5
+    sensor.close()
+
+
+def test_device_by_name(iio):
+    sensor = AmbientLightSensor(str(iio), device="acpi-als")
+    assert sensor.device == "iio:device1"
+    sensor.close()
+    with pytest.raises(OSError):
+        AmbientLightSensor(str(iio), device="accel")
+
+
+def test_create_ambient_sensor(iio, tmp_path, monkeypatch):
+    assert create_ambient_sensor("off") is None
+    sensor = create_ambient_sensor("auto")
+    assert sensor.device == "iio:device1"
+    sensor.close()
+    monkeypatch.setenv("GLIMMER_AMBIENT_SENSOR_ROOT", str(tmp_path / "missing"))
+    assert create_ambient_sensor("auto") is None
+    with pytest.raises(OSError):
+        create_ambient_sensor("iio:device1")
+
+
+def test_ambient_level():
+    assert ambient_level(0) == 0.0
+    assert ambient_level(10) == pytest.approx(1 / 3)
+    assert ambient_level(100000) == 1.0
+
+
+def test_gate_captures_on_change_and_heartbeat():
+    now = [0.0]
+    gate = AmbientGate(change_ratio=0.25, heartbeat=10.0, clock=lambda: now[0])
+    assert gate.check(100) and gate.reason == "first reading"
+    assert not gate.check(110)
+    assert gate.check(200) and gate.reason == "ambient light changed"
+    now[0] = 10.0
+    assert gate.check(200) and gate.reason == "heartbeat"
+    gate.reset()
+    assert gate.check(200) and gate.reason == "first reading"
+    assert (gate.captures, gate.skips) == (4, 1)
+
+
+def test_controller_skips_captures_while_the_room_is_steady(iio):
+    controller = BrightnessController(None, capture_backend="synthetic", backlight="memory", ambient_sensor="auto")
+    try:
+        grabs = []
+        grab = controller.capture.grab
+        controller.capture.grab = lambda: grabs.append(1) or grab()
+        now = [0.0]
+        controller.ambient_gate._clock = lambda: now[0]
+
+        first = controller.adjust_brightness(0, 7, 100, 10)
+        for _ in range(5):
+            assert controller.adjust_brightness(first[1], 7, 100, 10) == first
+        assert len(grabs) == 1
+        assert controller.ambient_lux == 205
+
+        (iio / "iio:device1" / "in_illuminance_raw").write_text("4000\n")
+        brighter = controller.adjust_brightness(first[1], 7, 100, 10)
+        assert len(grabs) == 2
+        assert brighter[1] > first[1]  # A brighter room raises the target
+    finally:
+        controller.close()
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.controllers.luminance import channel_sums, luma_mean, luma_sum, luminance_grid
+
+# luma_mean averages exact fixed-point luma while cv2 rounds every pixel to a
+# gray level first, so the two may differ by at most half a level
+TOLERANCE = 0.5
+
+
+def _frame(height=241, width=317, channels=3, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, channels), dtype=np.uint8)
+
+
+def _reference_rgb(frame):
+    # The pipeline luma_mean replaced: RGB to BGR copy, BGR to gray copy, then the mean
+    return cv2.cvtColor(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), cv2.COLOR_BGR2GRAY).mean()
+
+
+def test_rgb_matches_cv2():
+    frame = _frame()
+    assert luma_mean(frame, "RGB") == pytest.approx(_reference_rgb(frame), abs=TOLERANCE)
+
+
+def test_bgra_matches_cv2():
+    frame = _frame(channels=4)
+    expected = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY).mean()
+    assert luma_mean(frame, "BGRA") == pytest.approx(expected, abs=TOLERANCE)
+
+
+@pytest.mark.parametrize("view", [
+    lambda frame: frame[::3, ::2],  # Sampled rows and columns
+    lambda frame: frame[10:200, 5:300],  # Cropped to a display region
+    lambda frame: frame[:, :, 2::-1],  # Reversed channels
+], ids=["sampled", "cropped", "reversed-channels"])
+def test_strided_views_match_cv2(view):
+    strided = view(_frame(channels=4))[:, :, :3]
+    assert not strided.flags.c_contiguous
+    expected = _reference_rgb(np.ascontiguousarray(strided))
+    assert luma_mean(strided, "RGB") == pytest.approx(expected, abs=TOLERANCE)
+
+
+def test_solid_frame_is_exact():
+    frame = np.full((8, 8, 3), (200, 100, 50), dtype=np.uint8)
+    expected = (200 * 4899 + 100 * 9617 + 50 * 1868) / (1 << 14)
+    assert luma_mean(frame, "RGB") == expected
+    assert luma_sum(frame, "RGB") == 64 * (200 * 4899 + 100 * 9617 + 50 * 1868)
+
+
+def test_channel_sums():
+    frame = _frame(channels=4)
+    assert channel_sums(frame[::2, ::5]) == tuple(int(total) for total in frame[::2, ::5].sum(axis=(0, 1)))
+
+
+def test_empty_frame():
+    assert luma_mean(np.zeros((0, 4, 3), dtype=np.uint8)) == 0.0
+
+
+def test_grid_matches_cv2_per_block():
+    frame = _frame(height=90, width=160, channels=4)
+    grid = luminance_grid(frame[:, :, :3], rows=9, cols=16, channel_order="BGR")
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY).astype(np.float64)
+    expected = gray.reshape(9, 10, 16, 10).mean(axis=(1, 3))
+    np.testing.assert_allclose(grid, expected, atol=TOLERANCE)